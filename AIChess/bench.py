@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+from Model.bench import run_bench, run_startup_bench, BENCH_POSITIONS
+from Model.epd import read_epd
+
+
+# In kết quả benchmark dạng bảng
+def print_report(report: dict) -> None:
+    for result in report['positions']:
+        ebf = result['branching_factor'] if result['branching_factor'] is not None else "-"
+        time_to_depth = " ".join(f"d{info['depth']}={info['time']:.2f}s" for info in result['iterations'])
+        print(f"{result['name']:<13} move {str(result['move']):<6} score {str(result['score']):>6}  "
+              f"nodes {result['nodes']:>8}  {result['time']:7.2f}s  {result['nps']:>7} nps  ebf {ebf}  {time_to_depth}")
+    print(f"total nodes {report['total_nodes']}  time {report['total_time']:.2f}s  {report['nps']} nps")
+
+
+# In kết quả đo thời gian khởi động
+def print_startup_report(report: dict) -> None:
+    print(f"import Model.chess_ai  {report['import_time']:.2f} ms  (pygame loaded: {report['pygame_loaded']})")
+    for name, milliseconds in report['create_ms'].items():
+        print(f"{name:<13} {milliseconds:8.4f} ms  (mean of {report['repeat']})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fixed-depth search benchmark for ChessAI")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (default 3)")
+    parser.add_argument("--threads", type=int, default=1, help="Lazy SMP worker processes (default 1)")
+    parser.add_argument("--position", action="append", help="only run the named position(s)")
+    parser.add_argument("--no-null-move", action="store_true", help="disable null-move pruning")
+    parser.add_argument("--no-lmr", action="store_true", help="disable late move reductions")
+    parser.add_argument("--epd", help="benchmark the positions of an EPD/FEN file instead of the built-in set")
+    parser.add_argument("--startup", action="store_true", help="measure import and Board/ChessAI creation time instead")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        report = run_startup_bench()
+    else:
+        positions = BENCH_POSITIONS
+        if args.epd:
+            positions = ((operations.get("id", f"#{number}"), fen)
+                         for number, (fen, operations) in enumerate(read_epd(args.epd), 1))
+        report = run_bench(args.depth, args.position, args.threads, positions,
+                           use_null_move=not args.no_null_move, use_lmr=not args.no_lmr)
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return 0
+    if args.startup:
+        print_startup_report(report)
+    else:
+        print_report(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+# Chạy từ thư mục gốc của project: python -m AIChess.bench --depth 4 --json bench.json
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import time
+
+from Model.bitbase import DEFAULT_MATERIALS, RESULT_WIN, RESULT_LOSS, generate_bitbase, write_bitbase
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "bitbases")
+
+
+# In tiến độ sinh bảng trên cùng một dòng
+def print_progress(name: str, done: int, total: int) -> None:
+    print(f"\r{name}: {done * 100 // total:3d}%", end="", flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate win/draw/loss endgame bitbases by retrograde analysis")
+    parser.add_argument("materials", nargs="*", default=list(DEFAULT_MATERIALS),
+                        help="endgames to generate, in dependency order (default: KQK KRK KPK; KBNK takes hours)")
+    parser.add_argument("--output", default=DEFAULT_DIRECTORY, help="output directory (default assets/bitbases)")
+    args = parser.parse_args(argv)
+
+    for name in args.materials:
+        start_time = time.perf_counter()
+        values = generate_bitbase(name, args.output, print_progress)
+        path = write_bitbase(name, values, args.output)
+        wins = values.count(RESULT_WIN)
+        losses = values.count(RESULT_LOSS)
+        print(f"\r{name}: {wins} wins, {losses} losses for the side to move  "
+              f"{time.perf_counter() - start_time:.1f}s  -> {path}")
+    return 0
+
+
+# Chạy từ thư mục gốc của project: python -m AIChess.bitbase KQK KRK KPK
+if __name__ == "__main__":
+    sys.exit(main())
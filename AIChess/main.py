@@ -35,10 +35,16 @@ class ChessGame:
             while running_game:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
+                        # Stop the AI search and release its resources before leaving
+                        controller.cancel_search(wait=True)
+                        controller.ai.close()
                         pygame.quit()
                         sys.exit()
                     elif event.type == pygame.MOUSEBUTTONDOWN:
                         controller.handle_click(pygame.mouse.get_pos())
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                        # R: resign the current game
+                        controller.resign()
 
                 # Update display
                 controller.run()
@@ -47,7 +53,9 @@ class ChessGame:
                 if controller.game_over:
                     result = controller.board_view.show_game_over(controller.winner)
                     if result == "restart":
-                        # Exit game loop to return to menu
+                        # Make sure no search of the old game keeps running, then return to menu
+                        controller.cancel_search(wait=True)
+                        controller.ai.close()
                         running_game = False
                         break
 
@@ -0,0 +1,90 @@
+import argparse
+import sys
+
+from Model.board import Board
+from Model.epd import read_epd
+from Model.perft import PERFT_POSITIONS, INVALID_FENS, run_perft, divide, move_to_uci
+
+
+# Chạy perft trên bộ thế cờ chuẩn và so sánh với số nút đã biết, trả về False nếu có sai lệch
+def run_suite(depth: int, names=None, positions=PERFT_POSITIONS) -> bool:
+    all_ok = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in positions:
+        if names and name not in names:
+            continue
+        for current_depth in range(1, min(depth, len(expected)) + 1):
+            nodes, elapsed = run_perft(fen, current_depth)
+            ok = nodes == expected[current_depth - 1]
+            all_ok = all_ok and ok
+            total_nodes += nodes
+            total_time += elapsed
+            nps = int(nodes / elapsed) if elapsed > 0 else 0
+            print(f"{name:<10} depth {current_depth}  nodes {nodes:>9}  expected {expected[current_depth - 1]:>9}  "
+                  f"{'OK' if ok else 'FAIL':<4}  {elapsed:7.2f}s  {nps:>8} nps")
+
+    nps = int(total_nodes / total_time) if total_time > 0 else 0
+    print(f"total nodes {total_nodes}  time {total_time:.2f}s  {nps} nps  {'OK' if all_ok else 'FAIL'}")
+    return all_ok
+
+
+# Kiểm tra Board.from_fen từ chối các FEN không hợp lệ, trả về False nếu có FEN được chấp nhận
+def check_invalid_fens(fens=INVALID_FENS) -> bool:
+    all_ok = True
+    for name, fen in fens:
+        try:
+            Board.from_fen(fen)
+            ok = False
+        except ValueError:
+            ok = True
+        all_ok = all_ok and ok
+        print(f"{name:<15} invalid FEN rejected  {'OK' if ok else 'FAIL'}")
+    return all_ok
+
+
+# Đọc bộ perft từ file EPD dạng "<fen> ;D1 20 ;D2 400 ...", tên thế cờ lấy từ thao tác id nếu có
+def epd_positions(path: str):
+    for number, (fen, operations) in enumerate(read_epd(path), 1):
+        expected = []
+        while f"D{len(expected) + 1}" in operations:
+            expected.append(int(operations[f"D{len(expected) + 1}"]))
+        yield operations.get("id", f"#{number}"), fen, expected
+
+
+# In số nút theo từng nước đi ở gốc
+def run_divide(fen: str, depth: int) -> None:
+    board = Board.from_fen(fen)
+    result = divide(board, depth)
+    for move, nodes in sorted(result.items(), key=lambda item: move_to_uci(item[0])):
+        print(f"{move_to_uci(move)}: {nodes}")
+    print(f"total {sum(result.values())}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perft check and move generator benchmark")
+    parser.add_argument("--depth", type=int, default=3, help="maximum depth (default 3)")
+    parser.add_argument("--position", action="append", help="only run the named suite position(s)")
+    parser.add_argument("--fen", help="run a single FEN instead of the suite")
+    parser.add_argument("--epd", help="run the suite from an EPD file with ;D1 ;D2 ... node counts")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move (needs --fen)")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        if args.divide:
+            run_divide(args.fen, args.depth)
+        else:
+            nodes, elapsed = run_perft(args.fen, args.depth)
+            nps = int(nodes / elapsed) if elapsed > 0 else 0
+            print(f"nodes {nodes}  time {elapsed:.2f}s  {nps} nps")
+        return 0
+
+    if args.epd:
+        return 0 if run_suite(args.depth, args.position, epd_positions(args.epd)) else 1
+    fens_ok = check_invalid_fens() if not args.position else True
+    return 0 if run_suite(args.depth, args.position) and fens_ok else 1
+
+
+# Chạy từ thư mục gốc của project: python -m AIChess.perft --depth 3
+if __name__ == "__main__":
+    sys.exit(main())
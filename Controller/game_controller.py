@@ -1,6 +1,9 @@
+import os
+import queue
 import threading
+import time
 
-from Model.board import Board
+from Model.board import Board, BoardSnapshot, CHECKMATE, STALEMATE, DRAW
 from View.board_view import BoardView
 from Model.chess_ai import ChessAI
 from typing import Tuple, Optional
@@ -8,9 +11,18 @@ import pygame
 
 from View.pawn_promotion_view import PawnPromotionView
 
+# Sách khai cuộc Polyglot dùng cho AI nếu có file (không đi kèm project)
+BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "book.bin")
+# Bitbase tàn cuộc, sinh bằng python -m AIChess.bitbase
+BITBASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "bitbases")
+
+# AI tìm sâu dần đến AI_MAX_DEPTH, mỗi nước dùng tối đa 1/MOVES_TO_GO thời gian còn lại
+AI_MAX_DEPTH = 8
+MOVES_TO_GO = 40
+
 
 class GameController:
-    def __init__(self, player_color= None, time_limit=None):
+    def __init__(self, player_color= None, time_limit=None, ponder=True):
         # Thông tin người chơi và thời gian
         self.player_color = player_color
         self.time_limit = time_limit * 60  # Chuyển đổi phút thành giây
@@ -21,7 +33,9 @@ class GameController:
         self.board = Board()
         
         # Khởi tạo AI
-        self.ai = ChessAI("black" if player_color == "white" else "white")
+        self.ai = ChessAI("black" if player_color == "white" else "white", AI_MAX_DEPTH,
+                          book_path=BOOK_PATH if os.path.exists(BOOK_PATH) else None,
+                          bitbase_dir=BITBASE_DIR if os.path.isdir(BITBASE_DIR) else None)
         
         # Khởi tạo view
         self.board_view = None
@@ -42,49 +56,85 @@ class GameController:
         self.game_over = False
         self.winner = None  # "white", "black" hoặc None nếu hòa
 
-        # AI đi trước nếu người chơi chọn quân đen
-        if self.player_color == "black" and self.board.current_turn == "white":
-            self.make_ai_move()
+        # Thread tìm kiếm của AI; search_generation tăng mỗi lần hủy để thread cũ bỏ kết quả.
+        # Thread chỉ tìm kiếm trên ảnh chụp thế cờ và gửi (thế hệ, nước đi, PV) vào ai_results,
+        # nước đi được thực hiện trên self.board ở thread chính (run) nên view đọc bàn cờ không cần khóa
+        self.ai_thread = None
+        self.search_generation = 0
+        self.ai_results = queue.Queue()
+
+        # Suy nghĩ trước (ponder): trong lượt người chơi, AI tìm sẵn nước đáp trả cho nước đi dự đoán của người chơi
+        self.ponder = ponder
+        self.ponder_thread = None
+        self.ponder_move = None  # Nước đi dự đoán của người chơi
+        self.ponder_position = None  # Khóa Zobrist của thế cờ sau nước đi dự đoán
+        self.ponder_result = None  # Nước đi AI tìm được cho thế cờ đó
 
         # Trạng thái suy nghĩ của AI
         self.ai_thinking = False
 
+        # AI đi trước nếu người chơi chọn quân đen
+        if self.player_color == "black" and self.board.current_turn == "white":
+            self.make_ai_move()
+
     def init_view(self, board_size=640, margin=30):
         self.board_view = BoardView(board_size, margin, self.player_color)
         self.board_view.init_screen()
         self.update_view()
         
     def check_win(self):
+        # Trạng thái ván cờ của bên đang đi (được lưu lại theo thế cờ nên gọi mỗi khung hình không tốn chi phí)
+        status, _ = self.board.game_status()
+
         # Kiểm tra chiếu tướng
-        if self.board.is_checkmate("white"):
-            self.game_over = True
-            self.winner = "black"
-            self.win_by_checkmate = True
-            return True
-        elif self.board.is_checkmate("black"):
-            self.game_over = True
-            self.winner = "white"
-            self.win_by_checkmate = True
+        if status == CHECKMATE:
+            self.end_game("black" if self.board.current_turn == "white" else "white", win_by_checkmate=True)
             return True
             
         # Kiểm tra hết thời gian
         if self.player_remaining_time <= 0:
-            self.game_over = True
-            self.winner = "black" if self.player_color == "white" else "white"
+            self.end_game("black" if self.player_color == "white" else "white")
             return True
         elif self.ai_remaining_time <= 0:
-            self.game_over = True
-            self.winner = "white" if self.player_color == "white" else "black"
+            self.end_game("white" if self.player_color == "white" else "black")
             return True
             
-        # Kiểm tra hòa
-        if self.board.is_stalemate():
-            self.game_over = True
-            self.winner = None
+        # Kiểm tra hòa (hết nước đi hoặc không đủ quân chiếu hết)
+        if status in (STALEMATE, DRAW):
+            self.end_game(None)
             return True
             
         return False
 
+    # Kết thúc ván (winner là None nếu hòa) và dừng tìm kiếm của AI nếu đang chạy
+    def end_game(self, winner, win_by_checkmate=None):
+        self.game_over = True
+        self.winner = winner
+        if win_by_checkmate:
+            self.win_by_checkmate = True
+        self.cancel_search()
+
+    # Người chơi xin thua
+    def resign(self):
+        if not self.game_over:
+            self.end_game("black" if self.player_color == "white" else "white")
+
+    # Dừng tìm kiếm và suy nghĩ trước đang chạy, kết quả của chúng sẽ bị bỏ qua.
+    # wait=True chờ các thread kết thúc (khi chơi lại hoặc thoát game)
+    def cancel_search(self, wait=False):
+        self.search_generation += 1
+        self.ai.stop()
+        if wait:
+            for thread in (self.ai_thread, self.ponder_thread):
+                if thread is not None and thread is not threading.current_thread():
+                    self._stop_thread(thread)
+
+    # Gửi tín hiệu dừng cho đến khi thread kết thúc (tín hiệu có thể đến trước khi tìm kiếm bắt đầu)
+    def _stop_thread(self, thread):
+        while thread.is_alive():
+            self.ai.stop()
+            thread.join(0.05)
+
     # Xử lý click chuột
     def handle_click(self, pos: Tuple[int, int]):
 
@@ -147,37 +197,104 @@ class GameController:
 
     # Cho AI thực hiện nước đi
     def make_ai_move(self):
-
-
         # Đánh dấu là AI đang suy nghĩ
         self.ai_thinking = True
 
-        # Tạo thread cho AI suy nghĩ
-        ai_thread = threading.Thread(target=self._ai_thinking_process)
-        ai_thread.daemon = True
-        ai_thread.start()
+        # Tạo thread cho AI suy nghĩ trên ảnh chụp của thế cờ hiện tại
+        self.ai_thread = threading.Thread(target=self._ai_thinking_process,
+                                          args=(self.board.snapshot(), self.search_generation))
+        self.ai_thread.daemon = True
+        self.ai_thread.start()
+
+    # Thời gian suy nghĩ của AI, chạy trong một thread riêng trên bàn cờ riêng tạo từ ảnh chụp
+    def _ai_thinking_process(self, snapshot: BoardSnapshot, generation: int):
+        board = Board.from_snapshot(snapshot)
+
+        # Người chơi đi đúng nước đã dự đoán thì dùng luôn kết quả suy nghĩ trước
+        time_limit = self.move_time_limit()
+        best_move = self.finish_pondering(board.zobrist, time_limit)
+        principal_variation = []
+        if best_move is None and generation == self.search_generation:
+            # Hết thời gian của nước này thì dùng nước đi tốt nhất đã tìm được
+            best_move = self.ai.get_best_move(board, time_limit=time_limit)
+        if best_move is not None:
+            principal_variation = list(self.ai.principal_variation)
+
+        self.ai_results.put((generation, best_move, principal_variation))
+
+    # Thời gian suy nghĩ cho một nước của AI (giây)
+    def move_time_limit(self) -> float:
+        return max(self.ai_remaining_time / MOVES_TO_GO, 0.1)
+
+    # Thực hiện nước đi AI đã tìm được (gọi ở thread chính)
+    def apply_ai_move(self):
+        while True:
+            try:
+                generation, best_move, principal_variation = self.ai_results.get_nowait()
+            except queue.Empty:
+                return
 
-    # Thời gian suy nghĩ của AI, chạy trong một thread riêng
-    def _ai_thinking_process(self):
-        best_move = self.ai.get_best_move(self.board)
+            # Tìm kiếm đã bị hủy (chơi lại, xin thua, hết giờ): bỏ kết quả
+            if generation != self.search_generation or self.game_over:
+                continue
 
-        # Kết thúc suy nghĩ
-        self.ai_thinking = False
+            # Kết thúc suy nghĩ
+            self.ai_thinking = False
 
-        if best_move:
-            start, end = best_move
-            # Thực hiện nước đi
-            needs_promotion = self.board.move_piece(start, end)
-            if not needs_promotion:
-                self.board.move_piece(start, end)
-            else:
-                self.board.promote_pawn(end, "queen")  # Mặc định phong cấp thành hậu
+            if best_move:
+                start, end, promotion = best_move
+                # Thực hiện nước đi
+                needs_promotion = self.board.move_piece(start, end)
+                if needs_promotion:
+                    self.board.promote_pawn(end, promotion or "queen")  # Mặc định phong cấp thành hậu
 
-            # Reset thời gian bắt đầu lượt mới
-            self.current_turn_start_time = pygame.time.get_ticks()
+                # Reset thời gian bắt đầu lượt mới
+                self.current_turn_start_time = pygame.time.get_ticks()
 
-            # Kiểm tra chiến thắng
-            self.check_win()
+                # Kiểm tra chiến thắng
+                self.check_win()
+
+                if not self.game_over:
+                    self.start_pondering(principal_variation)
+
+    # Bắt đầu suy nghĩ trước trên bàn cờ riêng, dự đoán người chơi đi nước thứ hai của chuỗi nước đi tốt nhất (PV)
+    def start_pondering(self, principal_variation):
+        if not self.ponder or len(principal_variation) < 2:
+            return
+        predicted_move = principal_variation[1]
+        if predicted_move not in self.board.game_status()[1]:
+            return
+
+        ponder_board = Board.from_snapshot(self.board.snapshot())
+        ponder_board.make_move(predicted_move)
+        self.ponder_move = predicted_move
+        self.ponder_position = ponder_board.zobrist
+        self.ponder_result = None
+        self.ponder_thread = threading.Thread(target=self._ponder_process, args=(ponder_board,))
+        self.ponder_thread.daemon = True
+        self.ponder_thread.start()
+
+    # Tìm kiếm trước, dùng chung ChessAI nên bảng băm và bảng sắp xếp nước đi vẫn còn khi dự đoán đúng
+    def _ponder_process(self, ponder_board: Board):
+        self.ponder_result = self.ai.get_best_move(ponder_board)
+
+    # Trả về kết quả suy nghĩ trước nếu thế cờ cần tìm (khóa Zobrist position) đúng là thế cờ đã dự đoán
+    # (tìm tiếp tối đa time_limit giây rồi dừng), ngược lại dừng tìm kiếm và bỏ kết quả
+    def finish_pondering(self, position: int, time_limit: float):
+        if self.ponder_thread is None:
+            return None
+        thread = self.ponder_thread
+        self.ponder_thread = None
+        if self.ponder_position != position:
+            # Dự đoán sai: dừng ngay và bỏ kết quả
+            self._stop_thread(thread)
+            return None
+        # Đặt lại thời hạn cho đến khi thread kết thúc (tìm kiếm có thể chưa bắt đầu và sẽ xóa thời hạn)
+        deadline = time.time() + time_limit
+        while thread.is_alive():
+            self.ai.deadline = deadline
+            thread.join(0.05)
+        return self.ponder_result
 
     # Cập nhật thời gian còn lại
     def update_time(self):
@@ -220,6 +337,9 @@ class GameController:
             )
 
     def run(self):
+        # Thực hiện nước đi AI vừa tìm được
+        self.apply_ai_move()
+
         # Cập nhật thời gian nếu chưa có thời gian bắt đầu lượt
         if self.current_turn_start_time is None:
             self.current_turn_start_time = pygame.time.get_ticks()
@@ -228,8 +348,6 @@ class GameController:
         current_time = pygame.time.get_ticks()
         if self.current_turn_start_time is not None:
             elapsed_time = (current_time - self.current_turn_start_time) / 1000
-            if self.ai_thinking:
-                self.ai_remaining_time -= elapsed_time
             if self.board.current_turn == self.player_color:
                 self.player_remaining_time -= elapsed_time
             else:
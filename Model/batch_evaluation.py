@@ -0,0 +1,89 @@
+from typing import List, Sequence
+import numpy as np
+
+from Model.bitboard import COLORS
+from Model.pesto import MIDGAME_TABLE, ENDGAME_TABLE, GAMEPHASE_INC
+
+"""
+    Đánh giá PeSTO cho nhiều thế cờ cùng lúc bằng NumPy (dùng cho phân tích và tinh chỉnh tham số).
+    Hai cách mã hóa thế cờ:
+      - (N, 64): mã quân trên từng ô, 0 là ô trống, 1..6 là Tốt..Vua trắng, 7..12 là Tốt..Vua đen
+      - (N, 12, 64): 12 mặt phẳng 0/1, theo thứ tự Tốt..Vua trắng rồi Tốt..Vua đen
+    Kết quả giống hệt ChessAI.evaluate_board của AI cầm quân color
+"""
+
+# Bảng điểm theo mặt phẳng (12, 64), giống thứ tự mã quân
+MIDGAME_PLANES = np.array([MIDGAME_TABLE[color][piece_type] for color in COLORS for piece_type in range(6)],
+                          dtype=np.int64)
+ENDGAME_PLANES = np.array([ENDGAME_TABLE[color][piece_type] for color in COLORS for piece_type in range(6)],
+                          dtype=np.int64)
+PHASE_PLANES = np.array([GAMEPHASE_INC[piece_type] for _ in COLORS for piece_type in range(6)], dtype=np.int64)
+
+# Bảng điểm theo mã quân (13, 64), dòng 0 là ô trống
+MIDGAME_CODES = np.vstack([np.zeros((1, 64), dtype=np.int64), MIDGAME_PLANES])
+ENDGAME_CODES = np.vstack([np.zeros((1, 64), dtype=np.int64), ENDGAME_PLANES])
+PHASE_CODES = np.concatenate([np.zeros(1, dtype=np.int64), PHASE_PLANES])
+
+_SQUARES = np.arange(64)
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+
+
+# Pha trộn midgame/endgame theo giai đoạn game, trả về điểm theo góc nhìn của color
+def _tapered(mg_total: np.ndarray, eg_total: np.ndarray, game_phase: np.ndarray, color: str) -> np.ndarray:
+    mg_phase = np.minimum(game_phase, 24)
+    score = (mg_total * mg_phase + eg_total * (24 - mg_phase)) // 24
+    return score if color == "white" else -score
+
+
+# Đánh giá các thế cờ mã hóa dạng (N, 64)
+def evaluate_codes(codes: np.ndarray, color: str = "white") -> np.ndarray:
+    codes = np.asarray(codes, dtype=np.intp)
+    mg_total = MIDGAME_CODES[codes, _SQUARES].sum(axis=1)
+    eg_total = ENDGAME_CODES[codes, _SQUARES].sum(axis=1)
+    game_phase = PHASE_CODES[codes].sum(axis=1)
+    return _tapered(mg_total, eg_total, game_phase, color)
+
+
+# Đánh giá các thế cờ mã hóa dạng (N, 12, 64)
+def evaluate_planes(planes: np.ndarray, color: str = "white") -> np.ndarray:
+    planes = np.asarray(planes, dtype=np.int64)
+    mg_total = np.einsum("npq,pq->n", planes, MIDGAME_PLANES)
+    eg_total = np.einsum("npq,pq->n", planes, ENDGAME_PLANES)
+    game_phase = planes.sum(axis=2) @ PHASE_PLANES
+    return _tapered(mg_total, eg_total, game_phase, color)
+
+
+# Đánh giá hàng loạt, tự nhận dạng cách mã hóa theo số chiều của mảng
+def evaluate_batch(positions: np.ndarray, color: str = "white") -> np.ndarray:
+    positions = np.asarray(positions)
+    if positions.ndim == 2 and positions.shape[1] == 64:
+        return evaluate_codes(positions, color)
+    if positions.ndim == 3 and positions.shape[1:] == (12, 64):
+        return evaluate_planes(positions, color)
+    raise ValueError(f"Expected positions of shape (N, 64) or (N, 12, 64), got {positions.shape}")
+
+
+# Lấy 12 bitboard của mỗi Board thành mảng (N, 12) kiểu uint64
+def stack_bitboards(boards: Sequence) -> np.ndarray:
+    return np.array([board.bitboards.pieces[color] for board in boards for color in COLORS],
+                    dtype=np.uint64).reshape(len(boards), 12)
+
+
+# Mã hóa nhiều Board thành mặt phẳng (N, 12, 64), tách bit bằng phép dịch trên cả mảng
+def encode_boards(boards: Sequence) -> np.ndarray:
+    bitboards = stack_bitboards(boards)
+    return ((bitboards[:, :, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.uint8)
+
+
+# Chuyển mặt phẳng (N, 12, 64) sang mã quân (N, 64)
+def planes_to_codes(planes: np.ndarray) -> np.ndarray:
+    planes = np.asarray(planes)
+    codes = np.arange(1, 13, dtype=np.uint8)[None, :, None]
+    return (planes * codes).max(axis=1).astype(np.uint8)
+
+
+# Đánh giá trực tiếp danh sách Board
+def evaluate_boards(boards: Sequence, color: str = "white") -> List[int]:
+    if not boards:
+        return []
+    return evaluate_planes(encode_boards(boards), color).tolist()
@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from Model.board import Board, STARTING_FEN
+from Model.chess_ai import ChessAI
+from Model.perft import move_to_uci
+
+"""
+    Benchmark tìm kiếm: chạy ChessAI.get_best_move đến độ sâu cố định trên một bộ thế cờ cố định.
+    Mỗi thế cờ dùng một ChessAI mới nên tổng số nút là cố định giữa các lần chạy,
+    có thể dùng như chữ ký để nhận biết thay đổi hành vi của tìm kiếm
+"""
+
+# (tên, FEN)
+BENCH_POSITIONS: List[Tuple[str, str]] = [
+    ("startpos", STARTING_FEN),
+    ("italian", "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10"),
+    ("middlegame", "r2q1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2Q1RK1 b - - 0 10"),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+    ("rook_endgame", "8/8/4k3/8/2R5/4K3/4P3/6r1 w - - 0 1"),
+]
+
+
+# Chạy tìm kiếm trên một thế cờ và trả về kết quả đo
+def bench_position(name: str, fen: str, depth: int, threads: int = 1,
+                   use_null_move: bool = True, use_lmr: bool = True) -> Dict:
+    board = Board.from_fen(fen)
+    ai = ChessAI(board.current_turn, depth, threads=threads, use_null_move=use_null_move, use_lmr=use_lmr)
+    # Tiến trình phụ được khởi động trước khi đo, như khi chơi (khởi động một lần cho cả ván)
+    if threads > 1:
+        ai.start_pool()
+
+    start_time = time.perf_counter()
+    move = ai.get_best_move(board)
+    elapsed = time.perf_counter() - start_time
+    ai.close()
+
+    nodes = ai.nodes + ai.quiescence_nodes
+    iterations = [{
+        'depth': info['depth'],
+        'score': info['score'],
+        'nodes': info['nodes'],
+        'time': round(info['time'], 4),
+        'pv': [move_to_uci(pv_move) for pv_move in info['pv']],
+    } for info in ai.iterations]
+
+    # Hệ số rẽ nhánh hiệu dụng: tỷ lệ số nút giữa hai vòng lặp sâu dần cuối cùng
+    branching_factor = None
+    if len(iterations) >= 2:
+        last = iterations[-1]['nodes'] - iterations[-2]['nodes']
+        previous = iterations[-2]['nodes'] - (iterations[-3]['nodes'] if len(iterations) >= 3 else 0)
+        if previous > 0:
+            branching_factor = round(last / previous, 2)
+
+    return {
+        'name': name,
+        'fen': fen,
+        'depth': depth,
+        'move': move_to_uci(move) if move else None,
+        'score': ai.best_score,
+        'nodes': nodes,
+        'search_nodes': ai.nodes,
+        'quiescence_nodes': ai.quiescence_nodes,
+        'null_move_cutoffs': ai.null_move_cutoffs,
+        'reductions': ai.reductions,
+        'researches': ai.researches,
+        'time': round(elapsed, 4),
+        'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+        'branching_factor': branching_factor,
+        'iterations': iterations,
+    }
+
+
+# Chạy toàn bộ benchmark (mặc định trên BENCH_POSITIONS), trả về kết quả từng thế cờ và tổng hợp.
+# Với threads > 1 số nút chỉ tính tiến trình chính và không còn cố định giữa các lần chạy.
+# use_null_move/use_lmr tắt từng kỹ thuật cắt tỉa để so sánh
+def run_bench(depth: int, names=None, threads: int = 1, positions=BENCH_POSITIONS,
+              use_null_move: bool = True, use_lmr: bool = True) -> Dict:
+    results = [bench_position(name, fen, depth, threads, use_null_move, use_lmr)
+               for name, fen in positions if not names or name in names]
+    total_nodes = sum(result['nodes'] for result in results)
+    total_time = sum(result['time'] for result in results)
+    return {
+        'depth': depth,
+        'threads': threads,
+        'null_move': use_null_move,
+        'lmr': use_lmr,
+        'positions': results,
+        'total_nodes': total_nodes,
+        'total_time': round(total_time, 4),
+        'nps': int(total_nodes / total_time) if total_time > 0 else 0,
+    }
+
+
+# Đoạn mã chạy trong tiến trình mới để đo thời gian import Model, in ra (thời gian, pygame có bị import không)
+STARTUP_SCRIPT = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import Model.chess_ai\n"
+    "print(time.perf_counter() - start, 'pygame' in sys.modules)\n"
+)
+
+
+# Đo thời gian khởi động: import Model trong tiến trình mới, tạo Board, Board.from_fen, clone,
+# ảnh chụp thế cờ (snapshot, from_snapshot) và tạo ChessAI
+def run_startup_bench(repeat: int = 100) -> Dict:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=project_root,
+                            capture_output=True, text=True, check=True).stdout.split()
+    import_time, pygame_loaded = float(output[0]), output[1] == "True"
+
+    board = Board()
+    snapshot = board.snapshot()
+    timings = {}
+    for name, create in (("board", Board),
+                         ("from_fen", lambda: Board.from_fen(STARTING_FEN)),
+                         ("clone", board.clone),
+                         ("snapshot", board.snapshot),
+                         ("from_snapshot", lambda: Board.from_snapshot(snapshot)),
+                         ("chess_ai", lambda: ChessAI("white", hash_size_mb=1))):
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            create()
+        timings[name] = round((time.perf_counter() - start_time) / repeat * 1000, 4)
+
+    return {
+        'import_time': round(import_time * 1000, 2),
+        'pygame_loaded': pygame_loaded,
+        'repeat': repeat,
+        'create_ms': timings,
+    }
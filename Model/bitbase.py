@@ -0,0 +1,281 @@
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Model.board import Board
+from Model.bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING_ATTACKS
+from Model.piece import Pawn, Knight, Bishop, Rook, Queen, King
+from Model.zobrist import SIDE_KEY
+
+"""
+    Bitbase thắng/hòa/thua cho các tàn cuộc ít quân, một bên chỉ còn vua (KPK, KRK, KQK, KBNK, ...).
+    Bảng được sinh bằng phân tích ngược (retrograde) trên chính bộ sinh nước đi của Board:
+      1. Duyệt mọi thế cờ hợp lệ, sinh nước đi, ghi lại cạnh cha -> con trong cùng bảng.
+         Nước ăn quân/phong cấp dẫn sang bảng khác (hoặc hòa vì không đủ quân) được tra trực tiếp
+      2. Từ các thế bị chiếu hết (thua), lan ngược: cha của thế thua là thắng,
+         cha có mọi nước con đều thắng (cho đối phương) là thua; còn lại là hòa
+    Bảng luôn sinh cho bên mạnh là quân trắng, bên mạnh là quân đen thì lật hàng và đổi màu khi tra.
+    Chỉ số: ((bên đi * 64 + vua mạnh) * 64 + vua yếu) * 64 + các quân còn lại theo thứ tự trong tên
+    File: header rồi 2 bit cho mỗi chỉ số (0 hòa/không hợp lệ, 1 bên đi thắng, 2 bên đi thua)
+"""
+
+RESULT_DRAW, RESULT_WIN, RESULT_LOSS = 0, 1, 2
+
+# Số quân tối đa (kể cả hai vua) của các bảng hỗ trợ
+MAX_PIECES = 4
+
+# Các bảng sinh mặc định, theo thứ tự phụ thuộc (KPK cần KQK và KRK cho nước phong cấp)
+DEFAULT_MATERIALS = ("KQK", "KRK", "KPK")
+
+MAGIC = b"CEBB"
+VERSION = 1
+# magic, phiên bản, tên tàn cuộc (đệm 0), số chỉ số
+HEADER = struct.Struct("<4sB7sI")
+
+# Thứ tự quân trong tên tàn cuộc và lớp quân tương ứng
+PIECE_LETTERS = {QUEEN: "Q", ROOK: "R", BISHOP: "B", KNIGHT: "N", PAWN: "P"}
+LETTER_TYPES = {letter: piece_type for piece_type, letter in PIECE_LETTERS.items()}
+LETTER_CLASSES = {"Q": Queen, "R": Rook, "B": Bishop, "N": Knight, "P": Pawn}
+
+
+# Tên tàn cuộc của thế cờ và màu bên mạnh, None nếu không phải tàn cuộc một bên chỉ còn vua
+def material_name(board: Board) -> Optional[Tuple[str, str]]:
+    counts = {color: [len(positions) for positions in board.piece_lists[color]] for color in ("white", "black")}
+    bare = [color for color in ("white", "black") if sum(counts[color]) == 1]
+    if len(bare) != 1:
+        return None
+    strong = "black" if bare[0] == "white" else "white"
+    extras = "".join(PIECE_LETTERS[piece_type] * counts[strong][piece_type] for piece_type in PIECE_LETTERS)
+    return "K" + extras + "K", strong
+
+
+# Kiểm tra tên tàn cuộc hợp lệ: K + 1..MAX_PIECES-2 quân + K
+def validate_name(name: str) -> None:
+    extras = name[1:-1]
+    if (len(name) < 3 or name[0] != "K" or name[-1] != "K" or len(name) > MAX_PIECES
+            or any(letter not in LETTER_TYPES for letter in extras)):
+        raise ValueError(f"Unsupported bitbase material: {name!r}")
+
+
+# Chỉ số của thế cờ trong bảng name, lật hàng khi bên mạnh là quân đen
+def board_index(board: Board, name: str, strong: str) -> int:
+    weak = "black" if strong == "white" else "white"
+    flip = 56 if strong == "black" else 0
+
+    index = 0 if board.current_turn == strong else 1
+    strong_king, weak_king = board.king_squares[strong], board.king_squares[weak]
+    index = index * 64 + ((strong_king[0] * 8 + strong_king[1]) ^ flip)
+    index = index * 64 + ((weak_king[0] * 8 + weak_king[1]) ^ flip)
+
+    used = {}
+    for letter in name[1:-1]:
+        # Hai quân cùng loại lấy theo thứ tự ô tăng dần
+        positions = sorted(board.piece_lists[strong][LETTER_TYPES[letter]])
+        row, col = positions[used.get(letter, 0)]
+        used[letter] = used.get(letter, 0) + 1
+        index = index * 64 + ((row * 8 + col) ^ flip)
+    return index
+
+
+class Bitbases:
+    # Mở các bảng trong thư mục directory khi cần (mmap), không đọc file lúc khởi tạo
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables: Dict[str, Optional[mmap.mmap]] = {}
+        self.probes = 0
+        self.hits = 0
+
+    def _table(self, name: str) -> Optional[mmap.mmap]:
+        if name not in self.tables:
+            path = os.path.join(self.directory, name + ".bb")
+            table = None
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, stored_name, _ = HEADER.unpack_from(table, 0)
+                if magic != MAGIC or version != VERSION or stored_name.rstrip(b"\0").decode() != name:
+                    table.close()
+                    raise ValueError(f"Invalid bitbase file: {path}")
+            self.tables[name] = table
+        return self.tables[name]
+
+    # Kết quả cho bên đang đi (RESULT_*), None nếu không có bảng cho tàn cuộc này
+    def probe(self, board: Board) -> Optional[int]:
+        self.probes += 1
+        material = material_name(board)
+        if material is None or len(material[0]) > MAX_PIECES:
+            return None
+        table = self._table(material[0])
+        if table is None:
+            return None
+        self.hits += 1
+        index = board_index(board, *material)
+        return (table[HEADER.size + (index >> 2)] >> ((index & 3) * 2)) & 3
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+
+# Kết quả của thế cờ sau nước ăn quân/phong cấp (tàn cuộc khác)
+def _lookup_other(board: Board, bitbases: Bitbases) -> int:
+    if board.is_insufficient_material():
+        return RESULT_DRAW
+    result = bitbases.probe(board)
+    if result is None:
+        material = material_name(board)
+        raise ValueError(f"Bitbase {material[0] if material else board.to_fen()} is needed first")
+    return result
+
+
+# Sinh bảng name bằng phân tích ngược, trả về mảng kết quả cho từng chỉ số.
+# Bảng của nước phong cấp được tra trong directory (phải sinh trước)
+def generate_bitbase(name: str, directory: str,
+                     progress: Optional[Callable[[str, int, int], None]] = None) -> bytearray:
+    validate_name(name)
+    extras = name[1:-1]
+    piece_count = len(name)
+    size = 2 * 64 ** piece_count
+    bitbases = Bitbases(directory)
+
+    # Bàn cờ trống dùng chung (không có quyền nhập thành), các quân được dời sang ô của từng chỉ số
+    board = Board._blank()
+    board.castling_rights = 0
+    board.zobrist = board.compute_zobrist()
+    pieces = [King("white", (0, 0)), King("black", (0, 0))] + [LETTER_CLASSES[letter]("white", (0, 0))
+                                                               for letter in extras]
+    current: List[Optional[int]] = [None] * piece_count
+
+    values = bytearray(size)
+    counts = array("H", bytes(2 * size))
+    edge_parents = array("I")
+    edge_children = array("I")
+    queue = deque()
+
+    for index in range(size):
+        # Tách chỉ số thành bên đi và ô của từng quân (quân cuối đổi nhanh nhất)
+        squares = []
+        rest = index
+        for _ in range(piece_count):
+            squares.append(rest & 63)
+            rest >>= 6
+        squares.reverse()
+        side = rest
+
+        if len(set(squares)) != piece_count or KING_ATTACKS[squares[0]] >> squares[1] & 1:
+            continue
+        if any(letter == "P" and not 8 <= sq < 56 for letter, sq in zip(extras, squares[2:])):
+            continue
+
+        # Dời các quân đã đổi ô: nhấc hết rồi mới đặt để không đè lên nhau
+        moved = [i for i in range(piece_count) if current[i] != squares[i]]
+        for i in moved:
+            if current[i] is not None:
+                board._remove_piece(pieces[i].position)
+        for i in moved:
+            position = (squares[i] >> 3, squares[i] & 7)
+            pieces[i].position = position
+            board._place_piece(position, pieces[i])
+            current[i] = squares[i]
+
+        turn = "white" if side == 0 else "black"
+        if board.current_turn != turn:
+            board.current_turn = turn
+            board.zobrist ^= SIDE_KEY
+        # Bên không đi đang bị chiếu là thế cờ không hợp lệ
+        if board.is_check("black" if turn == "white" else "white"):
+            continue
+
+        moves = list(board.generate_moves())
+        if not moves:
+            if board.is_check(turn):
+                values[index] = RESULT_LOSS
+                queue.append(index)
+            continue
+
+        remaining = 0
+        winning = False
+        for move in moves:
+            board.make_move(move)
+            if move[2] or len(board.squares) != piece_count:
+                result = _lookup_other(board, bitbases)
+                board.unmake_move()
+                if result == RESULT_LOSS:
+                    winning = True
+                    break
+                if result == RESULT_DRAW:
+                    # Nước đi giữ hòa: thế cờ này không bao giờ thua
+                    remaining += 1
+            else:
+                child = board_index(board, name, "white")
+                board.unmake_move()
+                edge_parents.append(index)
+                edge_children.append(child)
+                remaining += 1
+
+        if winning:
+            values[index] = RESULT_WIN
+            queue.append(index)
+        elif remaining == 0:
+            values[index] = RESULT_LOSS
+            queue.append(index)
+        else:
+            counts[index] = remaining
+
+        if progress and index & 0xFFFF == 0:
+            progress(name, index, size)
+
+    bitbases.close()
+
+    # Danh sách thế cờ cha của từng thế cờ con (dạng CSR)
+    parent_start = array("I", bytes(4 * (size + 1)))
+    for child in edge_children:
+        parent_start[child + 1] += 1
+    for index in range(size):
+        parent_start[index + 1] += parent_start[index]
+    cursor = array("I", parent_start)
+    parents = array("I", bytes(4 * len(edge_children)))
+    for parent, child in zip(edge_parents, edge_children):
+        parents[cursor[child]] = parent
+        cursor[child] += 1
+    del edge_parents, edge_children, cursor
+
+    # Lan ngược kết quả từ các thế đã biết
+    while queue:
+        child = queue.popleft()
+        child_value = values[child]
+        for parent in parents[parent_start[child]:parent_start[child + 1]]:
+            if values[parent]:
+                continue
+            if child_value == RESULT_LOSS:
+                values[parent] = RESULT_WIN
+                queue.append(parent)
+            else:
+                counts[parent] -= 1
+                if counts[parent] == 0:
+                    values[parent] = RESULT_LOSS
+                    queue.append(parent)
+
+    if progress:
+        progress(name, size, size)
+    return values
+
+
+# Ghi bảng ra file directory/name.bb, 4 chỉ số mỗi byte
+def write_bitbase(name: str, values: bytearray, directory: str) -> str:
+    packed = bytearray((len(values) + 3) // 4)
+    for index, value in enumerate(values):
+        if value:
+            packed[index >> 2] |= value << ((index & 3) * 2)
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + ".bb")
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, name.encode(), len(values)))
+        file.write(packed)
+    return path
@@ -0,0 +1,220 @@
+from typing import Tuple, List
+
+"""
+    Biểu diễn bàn cờ bằng bitboard: mỗi loại quân của mỗi màu là một số nguyên 64 bit.
+    Chỉ số ô: sq = row * 8 + col (row 0 là hàng thứ 8, phía quân đen), giống tọa độ (row, col) của Board
+"""
+
+# Chỉ số loại quân, dùng chung cho bitboard và các bảng đánh giá
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLORS = ("white", "black")
+
+# Quyền nhập thành, lưu dưới dạng bitmask
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+# Các hướng di chuyển (row, col)
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+# Chuyển tọa độ (row, col) sang chỉ số ô
+def square_index(position: Tuple[int, int]) -> int:
+    return position[0] * 8 + position[1]
+
+
+# Chuyển chỉ số ô sang tọa độ (row, col)
+def square_position(sq: int) -> Tuple[int, int]:
+    return SQUARE_POSITIONS[sq]
+
+
+# Duyệt qua chỉ số các bit bật trong bitboard
+def iter_bits(bb: int):
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def _step_table(steps: List[Tuple[int, int]]) -> List[int]:
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in steps:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+def _ray_table(direction: Tuple[int, int]) -> List[int]:
+    dr, dc = direction
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+        table.append(mask)
+    return table
+
+
+SQUARE_POSITIONS = [divmod(sq, 8) for sq in range(64)]
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+
+KNIGHT_ATTACKS = _step_table(KNIGHT_STEPS)
+KING_ATTACKS = _step_table(KING_STEPS)
+
+# Ô mà tốt của mỗi màu tấn công (tốt trắng đi lên, row giảm)
+PAWN_ATTACKS = {
+    "white": _step_table([(-1, -1), (-1, 1)]),
+    "black": _step_table([(1, -1), (1, 1)]),
+}
+
+# Tia theo từng hướng, hướng "dương" là hướng làm chỉ số ô tăng
+RAYS = {direction: _ray_table(direction) for direction in QUEEN_DIRECTIONS}
+POSITIVE_DIRECTIONS = {direction for direction in QUEEN_DIRECTIONS if direction[0] * 8 + direction[1] > 0}
+
+
+def _between_table() -> List[List[int]]:
+    table = [[0] * 64 for _ in range(64)]
+    for direction in QUEEN_DIRECTIONS:
+        dr, dc = direction
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            mask = 0
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                target = r * 8 + c
+                table[sq][target] = mask
+                mask |= 1 << target
+                r += dr
+                c += dc
+    return table
+
+
+# BETWEEN[a][b]: các ô nằm giữa a và b (không tính a, b), 0 nếu a và b không cùng hàng/cột/đường chéo
+BETWEEN = _between_table()
+
+
+# Ô bị chặn đầu tiên trên tia, dùng lsb cho hướng dương và msb cho hướng âm
+def _ray_attacks(sq: int, direction: Tuple[int, int], occupied: int) -> int:
+    ray = RAYS[direction][sq]
+    blockers = ray & occupied
+    if blockers:
+        if direction in POSITIVE_DIRECTIONS:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        ray ^= RAYS[direction][blocker]
+    return ray
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    attacks = 0
+    for direction in ROOK_DIRECTIONS:
+        attacks |= _ray_attacks(sq, direction, occupied)
+    return attacks
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    attacks = 0
+    for direction in BISHOP_DIRECTIONS:
+        attacks |= _ray_attacks(sq, direction, occupied)
+    return attacks
+
+
+class BitboardPosition:
+    def __init__(self):
+        # Bitboard cho từng loại quân của từng màu, đánh chỉ số theo PAWN..KING
+        self.pieces = {"white": [0] * 6, "black": [0] * 6}
+        # Các ô có quân của từng màu và của cả hai màu
+        self.occupancy = {"white": 0, "black": 0}
+        self.occupied = 0
+
+    # Đặt quân lên ô sq
+    def add(self, color: str, piece_type: int, sq: int) -> None:
+        bit = 1 << sq
+        self.pieces[color][piece_type] |= bit
+        self.occupancy[color] |= bit
+        self.occupied |= bit
+
+    # Nhấc quân khỏi ô sq
+    def remove(self, color: str, piece_type: int, sq: int) -> None:
+        mask = ~(1 << sq)
+        self.pieces[color][piece_type] &= mask
+        self.occupancy[color] &= mask
+        self.occupied &= mask
+
+    # Tập hợp các quân màu by_color đang tấn công ô sq
+    def attackers(self, sq: int, by_color: str, occupied: int = None) -> int:
+        if occupied is None:
+            occupied = self.occupied
+        enemy = self.pieces[by_color]
+        defender = "black" if by_color == "white" else "white"
+
+        attackers = PAWN_ATTACKS[defender][sq] & enemy[PAWN]
+        attackers |= KNIGHT_ATTACKS[sq] & enemy[KNIGHT]
+        attackers |= KING_ATTACKS[sq] & enemy[KING]
+
+        rooks = enemy[ROOK] | enemy[QUEEN]
+        if rooks:
+            attackers |= rook_attacks(sq, occupied) & rooks
+        bishops = enemy[BISHOP] | enemy[QUEEN]
+        if bishops:
+            attackers |= bishop_attacks(sq, occupied) & bishops
+        return attackers
+
+    # Tất cả các ô bị quân màu by_color tấn công, với occupied cho trước (ví dụ đã bỏ vua bên kia ra)
+    def attack_map(self, by_color: str, occupied: int) -> int:
+        enemy = self.pieces[by_color]
+
+        # Tốt tấn công theo cả khối bằng phép dịch bit
+        pawns = enemy[PAWN]
+        if by_color == "white":
+            attacks = ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+        else:
+            attacks = (((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)) & FULL_BOARD
+
+        for sq in iter_bits(enemy[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(enemy[KING]):
+            attacks |= KING_ATTACKS[sq]
+        for sq in iter_bits(enemy[ROOK] | enemy[QUEEN]):
+            attacks |= rook_attacks(sq, occupied)
+        for sq in iter_bits(enemy[BISHOP] | enemy[QUEEN]):
+            attacks |= bishop_attacks(sq, occupied)
+        return attacks
+
+    # Kiểm tra ô sq có bị quân màu by_color tấn công không
+    def is_attacked(self, sq: int, by_color: str) -> bool:
+        enemy = self.pieces[by_color]
+        defender = "black" if by_color == "white" else "white"
+
+        if PAWN_ATTACKS[defender][sq] & enemy[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & enemy[KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & enemy[KING]:
+            return True
+
+        occupied = self.occupied
+        rooks = enemy[ROOK] | enemy[QUEEN]
+        if rooks and rook_attacks(sq, occupied) & rooks:
+            return True
+        bishops = enemy[BISHOP] | enemy[QUEEN]
+        if bishops and bishop_attacks(sq, occupied) & bishops:
+            return True
+        return False
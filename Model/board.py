@@ -1,48 +1,190 @@
-import pygame
-import sys
-from typing import Optional, Tuple, Dict, List
+from types import MappingProxyType
+from typing import Optional, Tuple, Dict, List, Mapping, Iterator, NamedTuple
 from Model.piece import Piece, Pawn, Rook, Knight, Bishop, Queen, King
+from Model.pesto import MIDGAME_TABLE, ENDGAME_TABLE, GAMEPHASE_INC
+from Model.zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
+from Model.bitboard import (BitboardPosition, square_index, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                            BLACK_KINGSIDE, BLACK_QUEENSIDE, ALL_CASTLING, FULL_BOARD, BETWEEN,
+                            KNIGHT, ROOK, BISHOP, QUEEN, KING, rook_attacks, bishop_attacks, iter_bits)
+
+# Nước đi: (ô xuất phát, ô đích, loại quân phong cấp hoặc None)
+Move = Tuple[Tuple[int, int], Tuple[int, int], Optional[str]]
+
+PROMOTION_TYPES = ("queen", "rook", "bishop", "knight")
+PROMOTION_CLASSES = {"queen": Queen, "rook": Rook, "bishop": Bishop, "knight": Knight}
+
+# Ký hiệu quân trong FEN
+FEN_PIECES = {"p": Pawn, "n": Knight, "b": Bishop, "r": Rook, "q": Queen, "k": King}
+FEN_SYMBOLS = {piece_class: symbol for symbol, piece_class in FEN_PIECES.items()}
+FEN_CASTLING = (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE))
+# Quyền nhập thành -> (màu, ô vua, ô xe) phải có quân tương ứng thì quyền mới còn hiệu lực
+CASTLING_SQUARES = {
+    WHITE_KINGSIDE: ("white", (7, 4), (7, 7)),
+    WHITE_QUEENSIDE: ("white", (7, 4), (7, 0)),
+    BLACK_KINGSIDE: ("black", (0, 4), (0, 7)),
+    BLACK_QUEENSIDE: ("black", (0, 4), (0, 0)),
+}
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Trạng thái ván cờ của bên đang đi, trả về bởi game_status
+ONGOING, CHECKMATE, STALEMATE, DRAW = "ongoing", "checkmate", "stalemate", "draw"
+
+# Số thế cờ tối đa trong bộ nhớ đệm của game_status, khi đầy thì bỏ thế cờ được lưu lâu nhất
+STATUS_CACHE_SIZE = 2048
+
+# Quyền nhập thành còn lại khi có quân đi từ/đến ô tương ứng (vua hoặc xe ở góc)
+CASTLING_MASK = {
+    (7, 4): ALL_CASTLING & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE),
+    (7, 7): ALL_CASTLING & ~WHITE_KINGSIDE,
+    (7, 0): ALL_CASTLING & ~WHITE_QUEENSIDE,
+    (0, 4): ALL_CASTLING & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE),
+    (0, 7): ALL_CASTLING & ~BLACK_KINGSIDE,
+    (0, 0): ALL_CASTLING & ~BLACK_QUEENSIDE,
+}
+
+# Ảnh chụp bất biến của thế cờ để tìm kiếm ở thread/tiến trình khác: FEN và khóa Zobrist các thế cờ trước đó
+# (kể từ nước đi tốt hoặc ăn quân gần nhất, cũ nhất trước) để vẫn nhận ra thế cờ lặp lại
+class BoardSnapshot(NamedTuple):
+    fen: str
+    history: Tuple[int, ...]
+
 
 class Board():
+    # Bật để kiểm tra khóa Zobrist với cách tính lại từ đầu sau mỗi make_move/unmake_move
+    debug_zobrist = False
+
     def __init__(self):
-        self.squares = {}  # Dictionary lưu trữ các quân cờ trên bàn
-        self.current_turn = "white"  # Lượt đi hiện tại, bắt đầu là white
-        self.move_history = []  # Lịch sử các nước đi
-        
-        pygame.init()
+        self._reset_state()
         self.init_board()
         self.update_all_pieces_status()
+        self.zobrist = self.compute_zobrist()
+
+    # Bàn cờ trống (không quân, trắng đi, đủ quyền nhập thành), không dựng thế cờ ban đầu.
+    # Dùng cho from_fen/from_snapshot/clone vì chúng đặt lại toàn bộ quân cờ
+    @classmethod
+    def _blank(cls) -> "Board":
+        board = cls.__new__(cls)
+        board._reset_state()
+        return board
+
+    # Đặt lại mọi trạng thái của bàn cờ về bàn cờ trống
+    def _reset_state(self) -> None:
+        self._reset_position()
+        self.current_turn = "white"  # Lượt đi hiện tại, bắt đầu là white
+        self.move_history = []  # Lịch sử các nước đi
+        self.en_passant = None  # Ô có thể bắt tốt qua đường sau nước đi tốt 2 ô
+        self.castling_rights = ALL_CASTLING  # Quyền nhập thành còn lại
+        self.halfmove_clock = 0  # Số nửa nước từ lần cuối đi tốt hoặc ăn quân (luật 50 nước)
+        self.fullmove_number = 1  # Số thứ tự nước đi, tăng sau mỗi nước của quân đen
+        self._undo_stack = []  # Thông tin để hoàn tác các nước đi của make_move
+        self.previous_keys = ()  # Khóa Zobrist các thế cờ trước nước đi đầu tiên trong _undo_stack (từ ảnh chụp)
+
+    # Xóa hết quân cờ và các cấu trúc đi kèm
+    def _reset_position(self) -> None:
+        self._squares = {}  # Dictionary lưu trữ các quân cờ trên bàn
+        self.bitboards = BitboardPosition()  # Bitboard của các quân cờ, luôn đồng bộ với _squares
+        # Vị trí các quân theo màu và loại quân (chỉ số PAWN..KING), và vị trí hai vua
+        self.piece_lists = {"white": [set() for _ in range(6)], "black": [set() for _ in range(6)]}
+        self.king_squares = {"white": None, "black": None}
+        self.zobrist = 0  # Khóa Zobrist 64 bit của thế cờ, cập nhật dần theo từng nước đi
+        # Tổng điểm PeSTO (trắng - đen) cho midgame, endgame và giai đoạn game, cập nhật dần theo từng nước đi
+        self.midgame_score = 0
+        self.endgame_score = 0
+        self.game_phase = 0
+        self._status_cache = {}  # Khóa Zobrist -> (trạng thái, danh sách nước đi hợp lệ), dùng cho game_status
+
+    # Bộ nhớ đệm của game_status không được pickle (ví dụ khi gửi bàn cờ sang tiến trình khác)
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_status_cache'] = {}
+        return state
 
     # Khởi tạo bàn cờ
     def init_board(self):
         # Khởi tạo quân trắng
-        self.squares[(7, 0)] = Rook("white", (7, 0))
-        self.squares[(7, 1)] = Knight("white", (7, 1))
-        self.squares[(7, 2)] = Bishop("white", (7, 2))
-        self.squares[(7, 3)] = Queen("white", (7, 3))
-        self.squares[(7, 4)] = King("white", (7, 4))
-        self.squares[(7, 5)] = Bishop("white", (7, 5))
-        self.squares[(7, 6)] = Knight("white", (7, 6))
-        self.squares[(7, 7)] = Rook("white", (7, 7))
+        self._place_piece((7, 0), Rook("white", (7, 0)))
+        self._place_piece((7, 1), Knight("white", (7, 1)))
+        self._place_piece((7, 2), Bishop("white", (7, 2)))
+        self._place_piece((7, 3), Queen("white", (7, 3)))
+        self._place_piece((7, 4), King("white", (7, 4)))
+        self._place_piece((7, 5), Bishop("white", (7, 5)))
+        self._place_piece((7, 6), Knight("white", (7, 6)))
+        self._place_piece((7, 7), Rook("white", (7, 7)))
         for col in range(8):
-            self.squares[(6, col)] = Pawn("white", (6, col))
+            self._place_piece((6, col), Pawn("white", (6, col)))
 
 
         # Khởi tạo quân đen
-        self.squares[(0, 0)] = Rook("black", (0, 0))
-        self.squares[(0, 1)] = Knight("black", (0, 1))
-        self.squares[(0, 2)] = Bishop("black", (0, 2))
-        self.squares[(0, 3)] = Queen("black", (0, 3))
-        self.squares[(0, 4)] = King("black", (0, 4))
-        self.squares[(0, 5)] = Bishop("black", (0, 5))
-        self.squares[(0, 6)] = Knight("black", (0, 6))
-        self.squares[(0, 7)] = Rook("black", (0, 7))
+        self._place_piece((0, 0), Rook("black", (0, 0)))
+        self._place_piece((0, 1), Knight("black", (0, 1)))
+        self._place_piece((0, 2), Bishop("black", (0, 2)))
+        self._place_piece((0, 3), Queen("black", (0, 3)))
+        self._place_piece((0, 4), King("black", (0, 4)))
+        self._place_piece((0, 5), Bishop("black", (0, 5)))
+        self._place_piece((0, 6), Knight("black", (0, 6)))
+        self._place_piece((0, 7), Rook("black", (0, 7)))
         for col in range(8):
-            self.squares[(1, col)] = Pawn("black", (1, col))
+            self._place_piece((1, col), Pawn("black", (1, col)))
+
+    # Các quân cờ trên bàn (chỉ đọc), mọi thay đổi phải qua _place_piece/_remove_piece
+    @property
+    def squares(self) -> Mapping[Tuple[int, int], Piece]:
+        return MappingProxyType(self._squares)
+
+    # Đặt quân cờ lên ô, cập nhật cả dictionary và bitboard
+    def _place_piece(self, position: Tuple[int, int], piece: Piece) -> None:
+        sq = square_index(position)
+        self._squares[position] = piece
+        self.bitboards.add(piece.color, piece.type_index, sq)
+        self.zobrist ^= PIECE_KEYS[piece.color][piece.type_index][sq]
+        self.midgame_score += MIDGAME_TABLE[piece.color][piece.type_index][sq]
+        self.endgame_score += ENDGAME_TABLE[piece.color][piece.type_index][sq]
+        self.game_phase += GAMEPHASE_INC[piece.type_index]
+        self.piece_lists[piece.color][piece.type_index].add(position)
+        if piece.type_index == KING:
+            self.king_squares[piece.color] = position
+
+    # Nhấc quân cờ khỏi ô, trả về quân bị nhấc
+    def _remove_piece(self, position: Tuple[int, int]) -> Piece:
+        sq = square_index(position)
+        piece = self._squares.pop(position)
+        self.bitboards.remove(piece.color, piece.type_index, sq)
+        self.zobrist ^= PIECE_KEYS[piece.color][piece.type_index][sq]
+        self.midgame_score -= MIDGAME_TABLE[piece.color][piece.type_index][sq]
+        self.endgame_score -= ENDGAME_TABLE[piece.color][piece.type_index][sq]
+        self.game_phase -= GAMEPHASE_INC[piece.type_index]
+        self.piece_lists[piece.color][piece.type_index].discard(position)
+        if piece.type_index == KING:
+            self.king_squares[piece.color] = None
+        return piece
+
+    # Các quân cờ của bên color, lấy theo danh sách quân thay vì duyệt cả bàn cờ
+    def get_pieces(self, color: str) -> List[Piece]:
+        squares = self._squares
+        return [squares[position] for positions in self.piece_lists[color] for position in positions]
+
+    # Tính khóa Zobrist từ đầu (dùng khi khởi tạo và để kiểm tra khóa cập nhật dần)
+    def compute_zobrist(self) -> int:
+        key = 0
+        for position, piece in self._squares.items():
+            key ^= PIECE_KEYS[piece.color][piece.type_index][square_index(position)]
+        if self.current_turn == "black":
+            key ^= SIDE_KEY
+        key ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant:
+            key ^= EN_PASSANT_KEYS[self.en_passant[1]]
+        return key
+
+    # Kiểm tra khóa Zobrist cập nhật dần có khớp với khóa tính lại từ đầu không
+    def verify_zobrist(self) -> None:
+        expected = self.compute_zobrist()
+        if self.zobrist != expected:
+            raise AssertionError(f"Zobrist key mismatch: {self.zobrist:016x} != {expected:016x}")
 
     # Lấy quân cờ tại vị trí trên bàn cờ
     def get_piece(self, position: Tuple[int, int]) -> Optional[Piece]:
-        return self.squares.get(position)
+        return self._squares.get(position)
 
     # Lấy thông tin quân cờ tại vị trí trên bàn cờ
     def get_piece_data(self, position: Tuple[int, int]) -> Optional[dict]:
@@ -63,42 +205,27 @@ class Board():
 
         color = piece.color
 
-        # Tạo quân cờ mới theo loại đã chọn
-        if promotion_type == "queen":
-            new_piece = Queen(color, position)
-        elif promotion_type == "rook":
-            new_piece = Rook(color, position)
-        elif promotion_type == "bishop":
-            new_piece = Bishop(color, position)
-        elif promotion_type == "knight":
-            new_piece = Knight(color, position)
-        else:
-            # Mặc định phong cấp thành hậu
-            new_piece = Queen(color, position)
+        # Tạo quân cờ mới theo loại đã chọn, mặc định phong cấp thành hậu
+        new_piece = PROMOTION_CLASSES.get(promotion_type, Queen)(color, position)
+        new_piece.has_moved = True
 
         # Thay thế tốt bằng quân cờ mới
-        self.squares[position] = new_piece
+        self._remove_piece(position)
+        self._place_piece(position, new_piece)
 
         # Cập nhật trạng thái quân cờ mới
         new_piece.update_status(self)
 
-    # Di chuyển quân cờ
+    # Di chuyển quân cờ (dùng cho người chơi), trả về True nếu tốt cần phong cấp
     def move_piece(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
-        piece = self.squares.get(start)
-
-        # Xử lý bắt tốt qua đường
-        if isinstance(piece, Pawn) and abs(end[1] - start[1]) == 1 and not self.get_piece(end):
-            captured_pawn_pos = (start[0], end[1])  # Vị trí của tốt bị bắt
-            del self.squares[captured_pawn_pos]  # Xóa tốt bị bắt
+        piece = self._squares.get(start)
 
         if piece:
             # Lưu nước đi vào lịch sử
             self.move_history.append((start, end, piece))
 
-            # Di chuyển quân cờ
-            self.squares[end] = piece
-            del self.squares[start]
-            piece.move(end)  # Cập nhật vị trí và has_moved
+            # Di chuyển quân cờ, tốt lên hàng cuối được giữ nguyên để promote_pawn phong cấp
+            self.make_move((start, end, None))
 
             # Kiểm tra phong cấp cho tốt
             needs_promotion = False
@@ -106,33 +233,181 @@ class Board():
                 if (piece.color == "white" and end[0] == 0) or (piece.color == "black" and end[0] == 7):
                     needs_promotion = True
 
-
-            # Xử lý nhập thành (nếu di chuyển vua 2 ô)
-            if isinstance(piece, King) and abs(end[1] - start[1]) == 2:
-                # Xác định vị trí của xe
-                rook_col = 7 if end[1] > start[1] else 0
-                rook_row = start[0]
-                rook = self.squares.get((rook_row, rook_col))
-
-                if rook and isinstance(rook, Rook):
-                    # Xác định vị trí mới của xe
-                    new_rook_col = 5 if end[1] > start[1] else 3
-
-                    # Di chuyển xe
-                    self.squares[(rook_row, new_rook_col)] = rook
-                    del self.squares[(rook_row, rook_col)]
-                    rook.move((rook_row, new_rook_col))
-
             # Cập nhật trạng thái các quân cờ
             self.update_all_pieces_status()
-
-            # Đổi lượt
-            self.current_turn = "black" if self.current_turn == "white" else "white"
             return needs_promotion
 
+    # Thực hiện nước đi ngay trên bàn cờ, lưu thông tin hoàn tác vào _undo_stack (dùng cho AI)
+    def make_move(self, move: Move) -> None:
+        start, end, promotion = move
+        previous_zobrist = self.zobrist
+        piece = self._remove_piece(start)
+        had_moved = piece.has_moved
+
+        # Quân bị ăn, kể cả tốt bị bắt qua đường
+        captured_pos = end
+        captured = self._squares.get(end)
+        if captured:
+            self._remove_piece(end)
+        elif end == self.en_passant and isinstance(piece, Pawn):
+            captured_pos = (start[0], end[1])
+            captured = self._remove_piece(captured_pos)
+
+        # Quân đặt xuống ô đích (quân mới nếu phong cấp)
+        placed = piece
+        if promotion:
+            placed = PROMOTION_CLASSES[promotion](piece.color, end)
+            placed.has_moved = True
+        self._place_piece(end, placed)
+        piece.position = end
+        piece.has_moved = True
+
+        # Xử lý nhập thành (nếu di chuyển vua 2 ô)
+        rook_from = rook_to = None
+        rook_had_moved = False
+        if isinstance(piece, King) and abs(end[1] - start[1]) == 2:
+            rook_from = (start[0], 7 if end[1] > start[1] else 0)
+            rook_to = (start[0], 5 if end[1] > start[1] else 3)
+            rook = self._remove_piece(rook_from)
+            rook_had_moved = rook.has_moved
+            self._place_piece(rook_to, rook)
+            rook.position = rook_to
+            rook.has_moved = True
+
+        self._undo_stack.append((start, end, piece, placed, captured, captured_pos, had_moved,
+                                 self.en_passant, self.castling_rights, rook_from, rook_to, rook_had_moved,
+                                 previous_zobrist, self.halfmove_clock))
+
+        # Bộ đếm nước đi
+        self.halfmove_clock = 0 if captured or isinstance(piece, Pawn) else self.halfmove_clock + 1
+        if piece.color == "black":
+            self.fullmove_number += 1
+
+        # Cập nhật quyền nhập thành và ô bắt tốt qua đường (cùng khóa Zobrist tương ứng)
+        rights = self.castling_rights
+        if rights:
+            rights &= CASTLING_MASK.get(start, ALL_CASTLING) & CASTLING_MASK.get(end, ALL_CASTLING)
+            if rights != self.castling_rights:
+                self.zobrist ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[rights]
+                self.castling_rights = rights
+        if self.en_passant:
+            self.zobrist ^= EN_PASSANT_KEYS[self.en_passant[1]]
+        if isinstance(piece, Pawn) and abs(end[0] - start[0]) == 2:
+            self.en_passant = ((start[0] + end[0]) // 2, start[1])
+            self.zobrist ^= EN_PASSANT_KEYS[start[1]]
+        else:
+            self.en_passant = None
+
+        # Đổi lượt
+        self.current_turn = "black" if self.current_turn == "white" else "white"
+        self.zobrist ^= SIDE_KEY
+
+        if self.debug_zobrist:
+            self.verify_zobrist()
+
+    # Nước đi cuối cùng đã thực hiện bằng make_move: (ô xuất phát, ô đích, quân đã đi) hoặc None (kể cả sau nước đi rỗng)
+    def get_last_move(self) -> Optional[Tuple[Tuple[int, int], Tuple[int, int], Piece]]:
+        if not self._undo_stack:
+            return None
+        record = self._undo_stack[-1]
+        if record[0] is None:
+            return None
+        return record[0], record[1], record[3]
+
+    # Thế cờ hiện tại đã xuất hiện trước đó (cùng bên đi) kể từ nước đi tốt hoặc ăn quân gần nhất,
+    # tìm trong _undo_stack rồi tiếp tục trong previous_keys
+    def is_repetition(self) -> bool:
+        stack = self._undo_stack
+        distance = 2
+        while distance <= self.halfmove_clock:
+            index = len(stack) - distance
+            if index >= 0:
+                key = stack[index][12]
+            else:
+                index += len(self.previous_keys)
+                if index < 0:
+                    break
+                key = self.previous_keys[index]
+            if key == self.zobrist:
+                return True
+            distance += 2
+        return False
+
+    # Khóa Zobrist các thế cờ trước đó còn cần để nhận ra thế cờ lặp lại (cũ nhất trước)
+    def repetition_keys(self) -> Tuple[int, ...]:
+        if not self.halfmove_clock:
+            return ()
+        keys = self.previous_keys + tuple(record[12] for record in self._undo_stack)
+        return keys[max(len(keys) - self.halfmove_clock, 0):]
+
+    # Ảnh chụp bất biến của thế cờ hiện tại
+    def snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(self.to_fen(), self.repetition_keys())
+
+    # Tạo bàn cờ riêng từ ảnh chụp
+    @classmethod
+    def from_snapshot(cls, snapshot: BoardSnapshot) -> "Board":
+        board = cls.from_fen(snapshot.fen)
+        board.previous_keys = snapshot.history
+        return board
+
+    # Hoàn tác nước đi cuối cùng của make_move
+    def unmake_move(self) -> None:
+        (start, end, piece, placed, captured, captured_pos, had_moved,
+         en_passant, castling_rights, rook_from, rook_to, rook_had_moved, zobrist,
+         halfmove_clock) = self._undo_stack.pop()
+
+        self.current_turn = "black" if self.current_turn == "white" else "white"
+        self.halfmove_clock = halfmove_clock
+        if piece.color == "black":
+            self.fullmove_number -= 1
+        self.en_passant = en_passant
+        self.castling_rights = castling_rights
+
+        # Trả xe về góc nếu là nước nhập thành
+        if rook_from:
+            rook = self._remove_piece(rook_to)
+            self._place_piece(rook_from, rook)
+            rook.position = rook_from
+            rook.has_moved = rook_had_moved
+
+        # Trả quân về ô xuất phát và đặt lại quân bị ăn
+        self._remove_piece(end)
+        self._place_piece(start, piece)
+        piece.position = start
+        piece.has_moved = had_moved
+        if captured:
+            self._place_piece(captured_pos, captured)
+
+        # Khôi phục khóa Zobrist đã lưu thay vì xor ngược lại từng phần
+        self.zobrist = zobrist
+        if self.debug_zobrist:
+            self.verify_zobrist()
+
+    # Nước đi rỗng (chỉ đổi lượt) cho null-move pruning, ghi vào _undo_stack như một nước đi không có quân.
+    # Bộ đếm luật 50 nước về 0 để không tìm thế cờ lặp lại xuyên qua nước đi rỗng
+    def make_null_move(self) -> None:
+        self._undo_stack.append((None, None, None, None, None, None, None,
+                                 self.en_passant, self.castling_rights, None, None, None,
+                                 self.zobrist, self.halfmove_clock))
+        self.halfmove_clock = 0
+        if self.en_passant:
+            self.zobrist ^= EN_PASSANT_KEYS[self.en_passant[1]]
+            self.en_passant = None
+        self.current_turn = "black" if self.current_turn == "white" else "white"
+        self.zobrist ^= SIDE_KEY
+
+    # Hoàn tác nước đi rỗng của make_null_move
+    def unmake_null_move(self) -> None:
+        record = self._undo_stack.pop()
+        self.en_passant = record[7]
+        self.zobrist = record[12]
+        self.halfmove_clock = record[13]
+        self.current_turn = "black" if self.current_turn == "white" else "white"
+
     # Kiểm tra xem nước đi có hợp lệ không
     def is_valid_move(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
-        piece = self.squares.get(start)
+        piece = self._squares.get(start)
         if not piece or piece.color != self.current_turn:
             return False
 
@@ -140,96 +415,186 @@ class Board():
         if not piece.is_valid_move(self, end):
             return False
 
-        # Thử di chuyển và kiểm tra xem vua có bị chiếu không
-        old_piece = self.squares.get(end)
-        old_position = piece.position
-        has_moved = piece.has_moved
+        return self._is_legal(piece, start, end, self._legal_context(piece.color))
 
-        self.squares[end] = piece
-        del self.squares[start]
-        piece.position = end
-        piece.has_moved = True
+    # Thử di chuyển và kiểm tra xem vua có bị chiếu không
+    def _is_king_safe_after(self, piece: Piece, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        self.make_move((start, end, None))
 
         # Kiểm tra xem vua có bị chiếu không
         is_check = self.is_check(piece.color)
 
         # Hoàn tác
-        self.squares[start] = piece
-        del self.squares[end]
-        piece.position = old_position
-        piece.has_moved = has_moved
+        self.unmake_move()
+        return not is_check
 
-        if old_piece:
-            self.squares[end] = old_piece
+    # Thông tin để kiểm tra nước đi hợp lệ mà không cần thử đi:
+    # (ô vua, mặt nạ chặn/ăn quân chiếu, số quân chiếu, tia ghim của các quân bị ghim, các ô bị đối phương tấn công)
+    def _legal_context(self, color: str) -> tuple:
+        bitboards = self.bitboards
+        opponent = "black" if color == "white" else "white"
+        king_position = self.king_squares[color]
+        if king_position is None:
+            return -1, FULL_BOARD, 0, {}, 0
+        king_square = square_index(king_position)
+
+        # Quân chiếu: chỉ được chặn đường hoặc ăn quân chiếu, chiếu đôi thì chỉ vua được đi
+        checkers = bitboards.attackers(king_square, opponent)
+        check_count = bin(checkers).count("1")
+        if check_count == 0:
+            check_mask = FULL_BOARD
+        elif check_count == 1:
+            check_mask = checkers | BETWEEN[king_square][checkers.bit_length() - 1]
+        else:
+            check_mask = 0
+
+        # Quân bị ghim: đúng một quân cùng màu nằm giữa vua và quân đối phương đi theo đường thẳng
+        occupied = bitboards.occupied
+        own = bitboards.occupancy[color]
+        enemy = bitboards.pieces[opponent]
+        snipers = ((rook_attacks(king_square, 0) & (enemy[ROOK] | enemy[QUEEN])) |
+                   (bishop_attacks(king_square, 0) & (enemy[BISHOP] | enemy[QUEEN])))
+        pins = {}
+        for sniper in iter_bits(snipers):
+            blockers = BETWEEN[king_square][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pins[blockers.bit_length() - 1] = BETWEEN[king_square][sniper] | (1 << sniper)
+
+        # Các ô bị tấn công, bỏ vua ra khỏi bàn để vua không thể lùi dọc theo tia chiếu
+        attacked = bitboards.attack_map(opponent, occupied & ~(1 << king_square))
+        return king_square, check_mask, check_count, pins, attacked
+
+    # Kiểm tra nước đi (đã hợp lệ về cách đi) không để vua bị chiếu, dựa trên _legal_context
+    def _is_legal(self, piece: Piece, start: Tuple[int, int], end: Tuple[int, int], context: tuple) -> bool:
+        king_square, check_mask, check_count, pins, attacked = context
+        target = square_index(end)
+
+        if isinstance(piece, King):
+            return not attacked >> target & 1
+
+        if check_count > 1:
+            return False
 
-        return not is_check
+        # Quân bị ghim chỉ được đi trên tia ghim
+        pin = pins.get(square_index(start))
+        if pin is not None and not pin >> target & 1:
+            return False
+
+        # Bắt tốt qua đường có thể mở đường chiếu theo hàng ngang, thử đi để kiểm tra
+        if isinstance(piece, Pawn) and end == self.en_passant:
+            return self._is_king_safe_after(piece, start, end)
+
+        return bool(check_mask >> target & 1)
 
     # Lấy quân vua của màu color, trả về None nếu không tìm thấy
     def get_king(self, color: str) -> Optional[King]:
-        for piece in self.squares.values():
-            if isinstance(piece, King) and piece.color == color:
-                return piece
-        return None
+        position = self.king_squares[color]
+        return self._squares[position] if position else None
 
     # Kiểm tra xem vua có bị chiếu không
     def is_check(self, color: str) -> bool:
         # Tìm vua của màu cần kiểm tra
-        king = None
-        for piece in self.squares.values():
-            if isinstance(piece, King) and piece.color == color:
-                king = piece
-                break
-        
-        if not king:
+        king_position = self.king_squares[color]
+        if king_position is None:
             return False
-            
+
         # Kiểm tra xem có quân cờ nào của đối phương đang tấn công vua không
-        for piece in self.squares.values():
-            if piece.color != color:
-                if piece.is_valid_move(self, king.position):
-                    return True
-        
-        return False
+        opponent = "black" if color == "white" else "white"
+        return self.bitboards.is_attacked(square_index(king_position), opponent)
 
     # Kiểm tra xem ô có bị tấn công không (dùng để xác định xem vua có đi vào vị trí đó được không)
     def is_square_under_attack(self, position: Tuple[int, int], color: str) -> bool:
-        for piece in self.squares.values():
-            if piece.color != color:
-                if isinstance(piece, King):
-                    # Kiểm tra xem quân vua có thể bị tấn công ô đó không
-                    king_pos = piece.position
-                    row_diff = abs(king_pos[0] - position[0])
-                    col_diff = abs(king_pos[1] - position[1])
-                    if row_diff <= 1 and col_diff <= 1:
-                        return True
-                elif piece.is_valid_move(self, position):
-                    return True
-        return False
+        opponent = "black" if color == "white" else "white"
+        return self.bitboards.is_attacked(square_index(position), opponent)
 
     # Cập nhật trạng thái của tất cả quân cờ
     def update_all_pieces_status(self):
-        for piece in self.squares.values():
+        for piece in self._squares.values():
             piece.update_status(self)
 
-    # Lấy tất cả các nước đi hợp lệ của quân cờ tại vị trí position
+    # Sinh các nước đi hợp lệ của một quân cờ, nước phong cấp được tách theo từng loại quân
+    def _generate_piece_moves(self, piece: Piece, context: tuple, captures_only: bool = False) -> Iterator[Move]:
+        start = piece.position
+        promotion_row = 0 if piece.color == "white" else 7
+        is_pawn = isinstance(piece, Pawn)
+        for end in piece.get_candidate_moves(self):
+            # Chỉ lấy nước ăn quân và phong cấp (dùng cho tìm kiếm tĩnh)
+            if captures_only and end not in self._squares and not (
+                    is_pawn and (end[0] == promotion_row or end == self.en_passant)):
+                continue
+            if not self._is_legal(piece, start, end, context):
+                continue
+            if is_pawn and end[0] == promotion_row:
+                for promotion in PROMOTION_TYPES:
+                    yield start, end, promotion
+            else:
+                yield start, end, None
+
+    # Sinh tất cả các nước đi hợp lệ của bên color (mặc định là bên đang đến lượt)
+    def generate_moves(self, color: Optional[str] = None, captures_only: bool = False) -> Iterator[Move]:
+        if color is None:
+            color = self.current_turn
+        context = self._legal_context(color)
+        # Chiếu đôi thì chỉ vua được đi
+        if context[2] > 1:
+            king = self.get_king(color)
+            pieces = [king] if king else []
+        else:
+            pieces = self.get_pieces(color)
+        for piece in pieces:
+            yield from self._generate_piece_moves(piece, context, captures_only)
+
+    # Kiểm tra bên color còn nước đi hợp lệ nào không
+    def has_legal_moves(self, color: str) -> bool:
+        for _ in self.generate_moves(color):
+            return True
+        return False
+
+    # Lấy tất cả các nước đi hợp lệ của quân cờ tại vị trí position (lọc từ danh sách của game_status)
     def get_valid_moves(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
-        piece = self.squares.get(position)
+        piece = self._squares.get(position)
         if not piece or piece.color != self.current_turn:
             return []
 
         valid_moves = []
+        for start, end, _ in self.game_status()[1]:
+            if start == position and end not in valid_moves:
+                valid_moves.append(end)
+        return valid_moves
 
-        for row in range(8):
-            for col in range(8):
-                if self.is_valid_move(position, (row, col)):
-                    valid_moves.append((row, col))
+    # Trạng thái ván cờ của bên đang đi cùng danh sách nước đi hợp lệ, chỉ sinh nước đi một lần cho mỗi thế cờ.
+    # Kết quả được lưu theo khóa Zobrist; danh sách trả về dùng chung nên không được sửa
+    def game_status(self) -> Tuple[str, List[Move]]:
+        cached = self._status_cache.get(self.zobrist)
+        if cached is not None:
+            return cached
+
+        moves = list(self.generate_moves())
+        if not moves:
+            status = CHECKMATE if self.is_check(self.current_turn) else STALEMATE
+        elif self.is_insufficient_material():
+            status = DRAW
+        else:
+            status = ONGOING
 
-        return valid_moves
+        if len(self._status_cache) >= STATUS_CACHE_SIZE:
+            # dict giữ thứ tự thêm vào: phần tử đầu tiên là thế cờ được lưu lâu nhất
+            del self._status_cache[next(iter(self._status_cache))]
+        self._status_cache[self.zobrist] = (status, moves)
+        return status, moves
+
+    # Không đủ quân để chiếu hết: chỉ còn hai vua, hoặc hai vua và một mã/tượng
+    def is_insufficient_material(self) -> bool:
+        if len(self._squares) == 2:
+            return True
+        if len(self._squares) > 3:
+            return False
+        return any(self.piece_lists[color][KNIGHT] or self.piece_lists[color][BISHOP] for color in ("white", "black"))
 
     # Lấy thông tin tất cả quân cờ trên bàn
     def get_all_pieces(self) -> List[dict]:
         pieces = []
-        for pos, piece in self.squares.items():
+        for pos, piece in self._squares.items():
             pieces.append({
                 'type': type(piece).__name__.lower(),
                 'color': piece.color,
@@ -249,30 +614,13 @@ class Board():
         if not king:
             return False
 
-        # Kiểm tra tất cả các nước đi của quân cờ cùng màu
-        positions = [(pos, piece) for pos, piece in self.squares.items() if piece.color == color]
-
-        for piece_pos, piece in positions:
-            if self.squares.get(piece_pos) != piece:
-                continue
-
-            valid_moves = []
-            # Lấy tất cả các nước đi hợp lệ của quân cờ cùng màu
-            for row in range(8):
-                for col in range(8):
-                    if self.is_valid_move(piece_pos, (row, col)):
-                        valid_moves.append((row, col))
-            # Nếu có nước đi hợp lệ (có thể bảo vệ vua), thì không phải chiếu hết
-            if valid_moves:
-                return False
-
-        # Nếu không có nước đi nào hợp lệ, thì là chiếu hết
-        return True
+        # Nếu có nước đi hợp lệ (có thể bảo vệ vua), thì không phải chiếu hết
+        return not self.has_legal_moves(color)
 
     # Kiểm tra hòa cờ
     def is_stalemate(self) -> bool:
         # Nếu chỉ còn 2 quân cờ trên bàn (vua và vua), thì hòa
-        if len(self.squares) == 2:
+        if len(self._squares) == 2:
             return True
 
         # Kiểm tra xem vua có đang bị chiếu không
@@ -280,28 +628,139 @@ class Board():
             return False
             
         # Kiểm tra xem có quân nào có thể di chuyển không
-        for piece in self.squares.values():
-            if piece.color == self.current_turn:
-                if piece.get_valid_moves(self):
-                    return False
-        return True
-
+        return not self.has_legal_moves(self.current_turn)
+
+
+    # Tạo bàn cờ từ chuỗi FEN (vị trí quân, bên đi, quyền nhập thành, ô bắt tốt qua đường, bộ đếm nước đi).
+    # Hai bộ đếm có thể bỏ trống (mặc định 0 và 1) như trong EPD
+    @classmethod
+    def from_fen(cls, fen: str) -> "Board":
+        fields = fen.split()
+        if len(fields) < 4 or len(fields) > 6:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        placement, turn, castling, en_passant = fields[:4]
+
+        board = cls._blank()
+
+        # Vị trí các quân, hàng đầu tiên trong FEN là row 0
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN placement: {placement!r}")
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                piece_class = FEN_PIECES.get(char.lower())
+                if piece_class is None or col > 7:
+                    raise ValueError(f"Invalid FEN placement: {placement!r}")
+                color = "white" if char.isupper() else "black"
+                board._place_piece((row, col), piece_class(color, (row, col)))
+                col += 1
+            if col != 8:
+                raise ValueError(f"Invalid FEN placement: {placement!r}")
+
+        if turn not in ("w", "b"):
+            raise ValueError(f"Invalid FEN side to move: {turn!r}")
+        board.current_turn = "white" if turn == "w" else "black"
+
+        # Mỗi bên đúng một vua, bên vừa đi không được đang bị chiếu
+        for color in ("white", "black"):
+            if len(board.piece_lists[color][KING]) != 1:
+                raise ValueError(f"Invalid FEN placement: {placement!r} ({color} must have exactly one king)")
+        if board.is_check("black" if board.current_turn == "white" else "white"):
+            raise ValueError(f"Invalid FEN: {fen!r} (side not to move is in check)")
+
+        # Trường nhập thành là "-" hoặc các ký tự KQkq không lặp lại
+        if castling != "-" and (not set(castling) <= set("KQkq") or len(set(castling)) != len(castling)):
+            raise ValueError(f"Invalid FEN castling rights: {castling!r}")
+        board.castling_rights = 0
+        for char, right in FEN_CASTLING:
+            if char in castling:
+                board.castling_rights |= right
+        # Bỏ quyền nhập thành khi vua hoặc xe không đứng ở ô ban đầu để cùng thế cờ luôn có cùng khóa
+        for right, (color, king_square, rook_square) in CASTLING_SQUARES.items():
+            king, rook = board._squares.get(king_square), board._squares.get(rook_square)
+            if not (isinstance(king, King) and king.color == color and isinstance(rook, Rook) and rook.color == color):
+                board.castling_rights &= ~right
+        # Vua/xe không còn quyền nhập thành từ ô của mình được coi là đã di chuyển
+        for position, piece in board._squares.items():
+            if isinstance(piece, (King, Rook)):
+                piece.has_moved = not board.castling_rights & ~CASTLING_MASK.get(position, ALL_CASTLING)
+
+        # Ô bắt tốt qua đường phải nằm sau tốt đối phương vừa đi 2 ô: hàng 6 khi trắng đi, hàng 3 khi đen đi,
+        # ô đó trống và có tốt đối phương ngay phía trước
+        board.en_passant = None
+        if en_passant != "-":
+            expected_rank = "6" if board.current_turn == "white" else "3"
+            if len(en_passant) != 2 or en_passant[0] not in "abcdefgh" or en_passant[1] != expected_rank:
+                raise ValueError(f"Invalid FEN en passant square: {en_passant!r}")
+            square = (8 - int(en_passant[1]), ord(en_passant[0]) - ord("a"))
+            pawn_square = (square[0] + (1 if board.current_turn == "white" else -1), square[1])
+            pawn = board._squares.get(pawn_square)
+            if (square in board._squares or not isinstance(pawn, Pawn)
+                    or pawn.color == board.current_turn):
+                raise ValueError(f"Invalid FEN en passant square: {en_passant!r} (no pawn to capture)")
+            board.en_passant = square
+
+        counters = fields[4:]
+        if not all(counter.isdigit() for counter in counters):
+            raise ValueError(f"Invalid FEN move counters: {' '.join(counters)!r}")
+        board.halfmove_clock = int(counters[0]) if counters else 0
+        board.fullmove_number = max(1, int(counters[1])) if len(counters) > 1 else 1
+
+        board.zobrist = board.compute_zobrist()
+        return board
+
+    # Xuất thế cờ hiện tại thành chuỗi FEN
+    def to_fen(self) -> str:
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for col in range(8):
+                piece = self._squares.get((row, col))
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                symbol = FEN_SYMBOLS[type(piece)]
+                text += symbol.upper() if piece.color == "white" else symbol
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        castling = "".join(char for char, right in FEN_CASTLING if self.castling_rights & right) or "-"
+        en_passant = "-"
+        if self.en_passant:
+            en_passant = chr(97 + self.en_passant[1]) + str(8 - self.en_passant[0])
+
+        return " ".join(("/".join(rows), "w" if self.current_turn == "white" else "b", castling, en_passant,
+                         str(self.halfmove_clock), str(self.fullmove_number)))
 
     # Tạo 1 bản sao bàn cờ, dùng cho AI
     def clone(self):
-        new_board = Board()
-        # Khởi tạo bàn cờ mới, giống bàn cờ hiện tại
-        new_board.squares = {} # Tạo một bản sao rỗng
+        # Khởi tạo bàn cờ trống rồi copy thế cờ hiện tại
+        new_board = self._blank()
         # Copy các quân cờ
-        for pos, piece in self.squares.items():
+        for pos, piece in self._squares.items():
             piece_type = type(piece)
             new_piece = piece_type(piece.color, pos)
             new_piece.has_moved = piece.has_moved
-            new_board.squares[pos] = new_piece
+            new_board._place_piece(pos, new_piece)
 
-        # Copy lượt đi hiện tại và lịch sử nước đi
+        # Copy lượt đi hiện tại, quyền nhập thành, bắt tốt qua đường và lịch sử nước đi
         new_board.current_turn = self.current_turn
+        new_board.castling_rights = self.castling_rights
+        new_board.en_passant = self.en_passant
+        new_board.halfmove_clock = self.halfmove_clock
+        new_board.fullmove_number = self.fullmove_number
         new_board.move_history = self.move_history.copy()
+        new_board.previous_keys = self.repetition_keys()
+        new_board.zobrist = new_board.compute_zobrist()
 
         # Copy trạng thái của các quân cờ
         new_board.update_all_pieces_status()
@@ -1,212 +1,178 @@
+import multiprocessing
+import queue
+import threading
+import time
 from typing import Tuple, List, Optional
-from Model.board import Board
-from Model.piece import Piece, Pawn, Knight, Bishop, Rook, Queen, King
+from Model.board import Board, Move, ONGOING, CHECKMATE
+from Model.piece import Pawn
+from Model.pesto import MIDGAME_VALUE, MIDGAME_TABLE, ENDGAME_TABLE, GAMEPHASE_INC
+from Model.transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from Model.opening_book import OpeningBook
+from Model.bitbase import Bitbases, MAX_PIECES, RESULT_DRAW, RESULT_WIN
+from Model.bitboard import KNIGHT, KING, KING_ATTACKS
+
+# Số ply tối đa lưu nước đi sát thủ (killer)
+MAX_PLY = 64
+
+# Điểm sắp xếp nước đi: nước PV > nước từ bảng băm > ăn quân (MVV-LVA) > phong cấp > killer > counter-move > history
+PV_MOVE_SCORE = 2000000
+HASH_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+PROMOTION_SCORE = 90000
+KILLER_SCORES = (80000, 79000)
+COUNTER_MOVE_SCORE = 70000
+HISTORY_LIMIT = 60000
+
+# Giá trị quân dùng cho MVV-LVA, theo chỉ số PAWN..KING
+ORDERING_VALUES = [1, 3, 3, 5, 9, 20]
+
+# Biên an toàn cho delta pruning trong tìm kiếm tĩnh
+DELTA_MARGIN = 200
+
+# Số nút giữa hai lần kiểm tra tín hiệu dừng và thời hạn (lũy thừa của 2)
+CHECK_INTERVAL = 1024
+
+# Điểm cho thế thắng theo bitbase (thấp hơn chiếu hết để vẫn ưu tiên nước chiếu hết tìm được)
+BITBASE_WIN = 10000
+
+# Null-move pruning: chỉ dùng khi độ sâu còn lại đủ lớn, cây con của nước đi rỗng giảm thêm R ply (R + 1 khi còn sâu)
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEEP_DEPTH = 6
+
+# Late move reductions: từ nước thứ LMR_FULL_DEPTH_MOVES trở đi, nước yên tĩnh được tìm nông hơn 1 ply
+# (2 ply từ nước thứ LMR_DEEP_MOVES khi còn sâu ít nhất LMR_DEEP_DEPTH)
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+LMR_DEEP_MOVES = 6
+LMR_DEEP_DEPTH = 6
 
 class ChessAI:
-    def __init__(self, color: str, depth: int = 3):
+    # Bật để so sánh điểm đánh giá cập nhật dần với điểm tính lại bằng cách duyệt cả bàn cờ
+    debug_evaluation = False
+
+    def __init__(self, color: str, depth: int = 3, hash_size_mb: int = 16, use_quiescence: bool = True,
+                 threads: int = 1, book_path: Optional[str] = None, book_depth: int = 16,
+                 book_mode: str = "weighted", bitbase_dir: Optional[str] = None,
+                 use_null_move: bool = True, use_lmr: bool = True):
         self.color = color  # Màu quân của AI
         self.depth = depth  # Độ sâu tìm kiếm
+        self.use_quiescence = use_quiescence  # Tìm kiếm tĩnh ở nút lá
+        self.use_null_move = use_null_move  # Null-move pruning
+        self.use_lmr = use_lmr  # Late move reductions (tìm nông hơn các nước yên tĩnh xếp sau)
+        self.threads = max(1, threads)  # Số tiến trình tìm kiếm song song (Lazy SMP), 1 là tìm kiếm đơn
+        self.helper_index = 0  # 0 là tiến trình chính, tiến trình phụ đánh số từ 1
+
+        # Các tiến trình phụ của Lazy SMP, khởi động một lần (start_pool) và dùng lại cho mọi lần tìm kiếm:
+        # hàng đợi việc của từng tiến trình, hàng đợi báo xong và tín hiệu dừng chung
+        self.helpers: List[multiprocessing.Process] = []
+        self.helper_tasks = []
+        self.helper_results = None
+        self.helper_stop = None
+
+        self.nodes = 0  # Số nút đã duyệt trong lần tìm kiếm gần nhất
+        self.quiescence_nodes = 0  # Số nút của tìm kiếm tĩnh trong lần tìm kiếm gần nhất
+        self.null_move_cutoffs = 0  # Số lần cắt tỉa nhờ nước đi rỗng
+        self.reductions = 0  # Số nước đi được tìm nông hơn (LMR)
+        self.researches = 0  # Số nước đi giảm độ sâu phải tìm lại đủ sâu
+
+        # Kết quả của vòng lặp sâu dần đã hoàn thành gần nhất
+        self.best_move = None
+        self.best_score = None
+        self.principal_variation = []  # Chuỗi nước đi tốt nhất của vòng trước, dùng để sắp xếp nước đi
+        self.iterations = []  # Thông tin từng vòng: độ sâu, điểm, số nút, thời gian, PV
+        self._follow_pv = False
+
+        # Dừng tìm kiếm: tín hiệu từ thread khác (stop) hoặc thời hạn, kiểm tra sau mỗi CHECK_INTERVAL nút
+        self.stop_signal = threading.Event()
+        self.deadline = None
+        self.stopped = False
+
+        # Bảng hỗ trợ sắp xếp nước đi
+        self.killers = [[None, None] for _ in range(MAX_PLY)]  # 2 nước đi yên tĩnh gây cắt tỉa ở mỗi ply
+        self.history = {color: [[0] * 64 for _ in range(6)] for color in ("white", "black")}  # [màu][loại quân][ô đích]
+        self.counter_moves = {}  # (màu, loại quân, ô đích của nước trước) -> nước đi đáp trả gây cắt tỉa
+
+        # Bảng băm các thế cờ đã tìm, giữ nguyên giữa các nước đi trong cùng một ván.
+        # Khi tìm kiếm song song, bảng nằm trong bộ nhớ chung để các tiến trình phụ cùng đọc/ghi
+        if self.threads > 1:
+            self.transposition_table = SharedTranspositionTable(hash_size_mb)
+        else:
+            self.transposition_table = TranspositionTable(hash_size_mb)
+
+        # Sách khai cuộc Polyglot (ánh xạ bằng mmap), chỉ dùng trong book_depth ply đầu của ván
+        self.opening_book = OpeningBook(book_path) if book_path else None
+        self.book_depth = book_depth
+        self.book_mode = book_mode  # "weighted" hoặc "best"
+
+        # Bitbase thắng/hòa/thua cho tàn cuộc ít quân (các file .bb được mmap khi cần)
+        self.bitbases = Bitbases(bitbase_dir) if bitbase_dir else None
 
         self.CHECK_MATE = 20000  # Giá trị đánh giá cho chiếu tướng
         self.STALE_MATE = 0  # Giá trị đánh giá cho hòa cờ
 
 
         # Tham khảo hàm đánh giá https://www.chessprogramming.org/PeSTO%27s_Evaluation_Function
+        # Bảng giá trị (Model.pesto) được tính sẵn một lần khi import và dùng chung cho mọi ChessAI
 
-        """
-            Đây là giá trị cho white, nếu là black thì sẽ lấy giá trị âm
-        """
-        # Giá trị của từng loại quân cho midgame và endgame
-        self.midgame_value = [82,337,365,477,1025,0]  # Tốt, Mã, Tượng, Xe, Hậu, Vua
-        self.endgame_value = [94,281,297,512,936,0]  # Tốt, Mã, Tượng, Xe, Hậu, Vua
-
-
-        """
-            PST (Piece Square Table) - Bảng giá trị vị trí cho từng quân cờ. 
-            Đây là cho white, nếu black thì sẽ đảo ngược hàng row = 7 - row
-        """
-        # Bảng giá trị vị trí cho từng quân cờ trong giai đoạn giữa
-        self.midgame_position_value = {
-            Pawn: [
-                [1025, 1025, 1025, 1025, 1025, 1025, 1025, 1025],
-                [98, 134, 61, 95, 68, 126, 34, -11],
-                [-6, 7, 26, 31, 65, 56, 25, -20],
-                [-14, 13, 6, 21, 23, 12, 17, -23],
-                [-27, -2, -5, 12, 17, 6, 10, -25],
-                [-26, -4, -4, -10, 3, 3, 33, -12],
-                [-35, -1, -20, -23, -15, 24, 38, -22],
-                [0, 0, 0, 0, 0, 0, 0, 0]
-            ],
-            Knight: [
-                [-167, -89, -34, -49, 61, -97, -15, -107],
-                [-73, -41, 72, 36, 23, 62, 7, -17],
-                [-47, 60, 37, 65, 84, 129, 73, 44],
-                [-9, 17, 19, 53, 37, 69, 18, 22],
-                [-13, 4, 16, 13, 28, 19, 21, -8],
-                [-23, -9, 12, 10, 19, 17, 25, -16],
-                [-29, -53, -12, -3, -1, 18, -14, -19],
-                [-105, -21, -58, -33, -17, -28, -19, -23]
-            ],
-            Bishop: [
-                [-29, 4, -82, -37, -25, -42, 7, -8],
-                [-26, 16, -18, -13, 30, 59, 18, -47],
-                [-16, 37, 43, 40, 35, 50, 37, -2],
-                [-4, 5, 19, 50, 37, 37, 7, -2],
-                [-6, 13, 13, 26, 34, 12, 10, 4],
-                [0, 15, 15, 15, 14, 27, 18, 10],
-                [4, 15, 16, 0, 7, 21, 33, 1],
-                [-33, -3, -14, -21, -13, -12, -39, -21]
-            ],
-            Rook: [
-                [32, 42, 32, 51, 63, 9, 31, 43],
-                [27, 32, 58, 62, 80, 67, 26, 44],
-                [-5, 19, 26, 36, 17, 45, 61, 16],
-                [-24, -11, 7, 26, 24, 35, -8, -20],
-                [-36, -26, -12, -1, 9, -7, 6, -23],
-                [-45, -25, -16, -17, 3, 0, -5, -33],
-                [-44, -16, -20, -9, -1, 11, -6, -71],
-                [-19, -13, 1, 17, 16, 7, -37, -26]
-            ],
-            Queen: [
-                [-28, 0, 29, 12, 59, 44, 43, 45],
-                [-24, -39, -5, 1, -16, 57, 28, 54],
-                [-13, -17, 7, 8, 29, 56, 47, 57],
-                [-27, -27, -16, -16, -1, 17, -2, 1],
-                [-9, -26, -9, -10, -2, -4, 3, -3],
-                [-14, 2, -11, -2, -5, 2, 14, 5],
-                [-35, -8, 11, 2, 8, 15, -3, 1],
-                [-1, -18, -9, 10, -15, -25, -31, -50]
-            ],
-            King: [
-                [-65, 23, 16, -15, -56, -34, 2, 13],
-                [29, -1, -20, -7, -8, -4, -38, -29],
-                [-9, 24, 2, -16, -20, 6, 22, -22],
-                [-17, -20, -12, -27, -30, -25, -14, -36],
-                [-49, -1, -27, -39, -46, -44, -33, -51],
-                [-14, -14, -22, -46, -44, -30, -15, -27],
-                [1, 7, -8, -64, -43, -16, 9, 8],
-                [-15, 36, 12, -54, 8, -28, 24, 14]
-            ]
-        }
-        # Bảng giá trị vị trí cho từng quân cờ trong giai đoạn cuối
-        self.endgame_position_value = {
-            Pawn: [
-                [936, 936, 936, 936, 936, 936, 936, 936],
-                [178, 173, 158, 134, 147, 132, 165, 187],
-                [94, 100, 85, 67, 56, 53, 82, 84],
-                [32, 24, 13, 5, -2, 4, 17, 17],
-                [13, 9, -3, -7, -7, -8, 3, -1],
-                [4, 7, -6, 1, 0, -5, -1, -8],
-                [13, 8, 8, 10, 13, 0, 2, -7],
-                [0, 0, 0, 0, 0, 0, 0, 0]
-            ],
-            Knight: [
-                [-58, -38, -13, -28, -31, -27, -63, -99],
-                [-25, -8, -25, -2, -9, -25, -24, -52],
-                [-24, -20, 10, 9, -1, -9, -19, -41],
-                [-17, 3, 22, 22, 22, 11, 8, -18],
-                [-18, -6, 16, 25, 16, 17, 4, -18],
-                [-23, -3, -1, 15, 10, -3, -20, -22],
-                [-42, -20, -10, -5, -2, -20, -23, -44],
-                [-29, -51, -23, -15, -22, -18, -50, -64]
-            ],
-            Bishop: [
-                [-14, -21, -11, -8, -7, -9, -17, -24],
-                [-8, -4, 7, -12, -3, -13, -4, -14],
-                [2, -8, 0, -1, -2, 6, 0, 4],
-                [-3, 9, 12, 9, 14, 10, 3, 2],
-                [-6, 3, 13, 19, 7, 10, -3, -9],
-                [-12, -3, 8, 10, 13, 3, -7, -15],
-                [-14, -18, -7, -1, 4, -9, -15, -27],
-                [-23, -9, -23, -5, -9, -16, -5, -17]
-            ],
-            Rook: [
-                [13, 10, 18, 15, 12, 12, 8, 5],
-                [11, 13, 13, 11, -3, 3, 8, 3],
-                [7, 7, 7, 5, 4, -3, -5, -3],
-                [4, 3, 13, 1, 2, 1, -1, 2],
-                [3, 5, 8, 4, -5, -6, -8, -11],
-                [-4, 0, -5, -1, -7, -12, -8, -16],
-                [-6, -6, 0, 2, -9, -9, -11, -3],
-                [-9, 2, 3, -1, -5, -13, 4, -20]
-            ],
-            Queen: [
-                [-9, 22, 22, 27, 27, 19, 10, 20],
-                [-17, 20, 32, 41, 58, 25, 30, 0],
-                [-20, 6, 9, 49, 47, 35, 19, 9],
-                [3, 22, 24, 45, 57, 40, 57, 36],
-                [-18, 28, 19, 47, 31, 34, 39, 23],
-                [-16, -27, 15, 6, 9, 17, 10, 5],
-                [-22, -23, -30, -16, -16, -23, -36, -32],
-                [-33, -28, -22, -43, -5, -32, -20, -41]
-            ],
-            King: [
-                [-74, -35, -18, -18, -11, 15, 4, -17],
-                [-12, 17, 14, 17, 17, 38, 23, 11],
-                [10, 17, 23, 15, 20, 45, 44, 13],
-                [-8, 22, 24, 27, 26, 33, 26, 3],
-                [-18, -4, 21, 24, 27, 23, 9, -11],
-                [-19, -3, 11, 21, 23, 16, 7, -9],
-                [-27, -11, 4, 13, 14, 4, -5, -17],
-                [-53, -34, -21, -11, -28, -14, -24, -43]
-            ]
-        }
-
-        # Dictionary để đánh giá giai đoạn của trò chơi
-        self.gamephase_inc = {
-            Pawn: 0,
-            Knight: 1,
-            Bishop: 1,
-            Rook: 2,
-            Queen: 4,
-            King: 0
-        }
-    # Hàm lấy chỉ số của quân cờ trong mảng đánh giá midgame và endgame
-    def get_piece_index(self,piece_type):
-        if piece_type == Pawn:
-            return 0
-        elif piece_type == Knight:
-            return 1
-        elif piece_type == Bishop:
-            return 2
-        elif piece_type == Rook:
-            return 3
-        elif piece_type == Queen:
-            return 4
-        elif piece_type == King:
-            return 5
-        return 0  # Default case
-
-    # Hàm đánh giá bàn cờ
+    # Hàm đánh giá bàn cờ, dùng tổng điểm midgame/endgame và giai đoạn game mà Board cập nhật theo từng nước đi
     def evaluate_board(self, board: Board) -> int:
-        mg_score = {"white": 0, "black": 0}
-        eg_score = {"white": 0, "black": 0}
-        game_phase = 0
+        mg_phase = min(board.game_phase, 24)
+        score = (board.midgame_score * mg_phase + board.endgame_score * (24 - mg_phase)) // 24
 
-        # Đánh giá các quân cờ trên bàn cờ
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece:
-                    # Lấy loại quân và màu sắc
-                    piece_type = type(piece)
-                    color = piece.color
+        if self.debug_evaluation:
+            self.check_evaluation(board, score if self.color == "white" else -score)
 
-                    # lấy chỉ số hàng và cột cho midgame và endgame (lật ngược hàng cho quân đen)
-                    pos_row = row if color == "white" else 7 - row
-                    piece_index = self.get_piece_index(piece_type)
+        return score if self.color == "white" else -score
 
-                    # Điểm số đánh midgame và endgame của cả trắng và đen (bằng điểm của mảng đánh giá + điểm vị trí)
-                    mg_score[color] += self.midgame_value[piece_index] + self.midgame_position_value[piece_type][pos_row][col]
+    # Điểm của thế cờ theo kết quả bitbase của bên đang đi. Thế thắng được cộng điểm đánh giá và điểm dồn vua
+    # (vua yếu ra mép bàn, ít ô đi, hai vua gần nhau) để AI tiến tới chiếu hết thay vì đi loanh quanh giữa các thế thắng
+    def bitbase_score(self, board: Board, result: int, is_maximizing: bool) -> int:
+        if result == RESULT_DRAW:
+            return self.STALE_MATE
+
+        ai_wins = (result == RESULT_WIN) == is_maximizing
+        winner = self.color if ai_wins else ("black" if self.color == "white" else "white")
+        loser = "black" if winner == "white" else "white"
+        (loser_row, loser_col), (winner_row, winner_col) = board.king_squares[loser], board.king_squares[winner]
+        center_distance = max(3 - loser_row, loser_row - 4) + max(3 - loser_col, loser_col - 4)
+        king_distance = abs(loser_row - winner_row) + abs(loser_col - winner_col)
+        # Số ô vua yếu còn đi được (không bị tấn công, không có quân mình), càng ít càng gần chiếu hết
+        positions = board.bitboards
+        king_moves = (KING_ATTACKS[loser_row * 8 + loser_col] & ~positions.occupancy[loser]
+                      & ~positions.attack_map(winner, positions.occupied))
+        mop_up = 30 * center_distance + 10 * (14 - king_distance) + 15 * (8 - bin(king_moves).count("1"))
+
+        score = BITBASE_WIN + mop_up
+        return (score if ai_wins else -score) + self.evaluate_board(board)
+
+    # So sánh điểm đánh giá cập nhật dần với điểm duyệt cả bàn cờ
+    def check_evaluation(self, board: Board, score: int) -> None:
+        expected = self.evaluate_board_full(board)
+        if score != expected:
+            raise AssertionError(f"Incremental evaluation {score} != full evaluation {expected}")
+
+    # Hàm đánh giá bàn cờ bằng cách duyệt tất cả các quân cờ
+    def evaluate_board_full(self, board: Board) -> int:
+        mg_total = 0
+        eg_total = 0
+        game_phase = 0
 
-                    eg_score[color] += self.endgame_value[piece_index] + self.endgame_position_value[piece_type][pos_row][col]
+        # Đánh giá các quân cờ trên bàn cờ, duyệt theo danh sách quân của từng màu.
+        # Bảng phẳng đã gộp giá trị quân, lật hàng và đổi dấu cho quân đen nên chỉ cần cộng dồn
+        for color in ("white", "black"):
+            for piece_index, positions in enumerate(board.piece_lists[color]):
+                if not positions:
+                    continue
+                midgame_table = MIDGAME_TABLE[color][piece_index]
+                endgame_table = ENDGAME_TABLE[color][piece_index]
 
-                    # Cập nhâật giai đoạn game
-                    game_phase += self.gamephase_inc[piece_type]
+                for row, col in positions:
+                    mg_total += midgame_table[row * 8 + col]
+                    eg_total += endgame_table[row * 8 + col]
 
-        # Tính toán tổng điểm cho cả hai giai đoạn midgame và endgame
-        mg_total = mg_score["white"] - mg_score["black"]
-        eg_total = eg_score["white"] - eg_score["black"]
+                # Cập nhâật giai đoạn game
+                game_phase += GAMEPHASE_INC[piece_index] * len(positions)
 
         # Tính toán điểm số pha trộn giữa midgame và endgame
         mg_phase = min(game_phase, 24)  # Giới hạn giai đoạn game từ 0 đến 24
@@ -220,94 +186,527 @@ class ChessAI:
 
     # Hàm tìm nước đi tốt nhất cho AI với alpha-beta pruning
     def minimax_alpha_beta(self, board: Board, depth: int, alpha: float, beta: float,
-                           is_maximizing: bool) -> Tuple[int, Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+                           is_maximizing: bool, ply: int = 0, allow_null: bool = True) -> Tuple[int, Optional[Move]]:
+        self.nodes += 1
+        if self.should_stop():
+            return 0, None
 
         if depth == 0:
+            # Nút lá thuộc tàn cuộc có bitbase: dùng kết quả chính xác thay cho tìm kiếm tĩnh
+            if self.bitbases and len(board.squares) <= MAX_PIECES:
+                result = self.bitbases.probe(board)
+                if result is not None:
+                    status = board.game_status()[0]
+                    if status == CHECKMATE:
+                        return (-self.CHECK_MATE if is_maximizing else self.CHECK_MATE), None
+                    return self.bitbase_score(board, result, is_maximizing), None
+            if self.use_quiescence:
+                return self.quiescence(board, alpha, beta, is_maximizing), None
             return self.evaluate_board(board), None
 
-        if board.is_checkmate("white"):
-            return -self.CHECK_MATE if self.color == "white" else self.CHECK_MATE, None
-        elif board.is_checkmate("black"):
-            return self.CHECK_MATE if self.color == "white" else -self.CHECK_MATE, None
-        elif board.is_stalemate():
+        # Lặp lại thế cờ đã có trong ván hoặc trên nhánh đang tìm được coi là hòa
+        if ply > 0 and board.is_repetition():
             return self.STALE_MATE, None
 
-        # Lấy màu quân hiện tại
-        current_color = self.color if is_maximizing else ("black" if self.color == "white" else "white")
-
-        # Lấy tất cả các nước đi có thể
-        possible_moves = self.get_all_possible_moves(board, current_color)
-
-        # Nếu không có nước đi nào
-        if not possible_moves:
+        # Tra bảng băm: dùng kết quả nếu đủ sâu (trừ ở gốc, nơi cần nước đi hợp lệ), và lấy nước đi tốt nhất để xét trước
+        key = board.zobrist
+        hash_move = None
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_flag, hash_move = entry
+            if ply > 0 and entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_score, hash_move
+                if entry_flag == LOWER_BOUND and entry_score >= beta:
+                    return entry_score, hash_move
+                if entry_flag == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score, hash_move
+
+        # Sinh nước đi hợp lệ một lần, đồng thời biết thế cờ đã kết thúc hay chưa
+        status, possible_moves = board.game_status()
+        if status == CHECKMATE:
+            # Bên đang đi bị chiếu hết
+            return (-self.CHECK_MATE if is_maximizing else self.CHECK_MATE), None
+        elif status != ONGOING:
             return self.STALE_MATE, None
 
+        # Tàn cuộc hòa theo bitbase: kết quả chính xác thay cho cả cây con (trừ ở gốc, nơi cần nước đi).
+        # Thế thắng/thua vẫn được tìm tiếp để thấy nước chiếu hết, bitbase được dùng ở nút lá
+        if ply > 0 and self.bitbases and len(board.squares) <= MAX_PIECES:
+            if self.bitbases.probe(board) == RESULT_DRAW:
+                return self.STALE_MATE, None
+
+        # Bị chiếu thì không dùng nước đi rỗng và không giảm độ sâu
+        in_check = False
+        if depth >= min(NULL_MOVE_MIN_DEPTH, LMR_MIN_DEPTH) and (self.use_null_move or self.use_lmr):
+            in_check = board.is_check(board.current_turn)
+
+        # Null-move pruning (không dùng trên PV, khi bị chiếu, ngay sau nước đi rỗng khác,
+        # hay khi bên đang đi chỉ còn vua và tốt vì dễ rơi vào thế zugzwang)
+        if (self.use_null_move and allow_null and ply > 0 and depth >= NULL_MOVE_MIN_DEPTH and not in_check
+                and not self._follow_pv and self.has_non_pawn_material(board, board.current_turn)):
+            if self.null_move_cutoff(board, depth, alpha, beta, is_maximizing, ply):
+                self.null_move_cutoffs += 1
+                return (beta if is_maximizing else alpha), None
+
+        # Khi đang đi theo PV của vòng trước, nước đi PV ở độ sâu này được xét đầu tiên
+        pv_move = None
+        if self._follow_pv:
+            pv_move = self.principal_variation[ply] if ply < len(self.principal_variation) else None
+            if pv_move not in possible_moves:
+                pv_move = None
+                self._follow_pv = False
+
+        # Sắp xếp nước đi để alpha-beta cắt tỉa sớm
+        possible_moves = self.order_moves(board, possible_moves, ply, hash_move, pv_move)
+
+        # Tiến trình phụ xoay thứ tự các nước ở gốc (giữ nước đầu tiên) để không tìm trùng cây với tiến trình chính
+        if ply == 0 and self.helper_index and len(possible_moves) > 2:
+            shift = self.helper_index % (len(possible_moves) - 1)
+            possible_moves = [possible_moves[0]] + possible_moves[1 + shift:] + possible_moves[1:1 + shift]
+
+        # Chỉ giảm độ sâu khi không bị chiếu và còn đủ sâu, ở gốc mọi nước đều được tìm đủ sâu
+        reduce_late = self.use_lmr and ply > 0 and depth >= LMR_MIN_DEPTH and not in_check
+
+        alpha_original, beta_original = alpha, beta
         best_move = None
         if is_maximizing:
             best_score = float('-inf')
-            for start, end in possible_moves:
-                # Tạo bản sao của bàn cờ để thử nước đi
-                board_copy = board.clone()
-                board_copy.move_piece(start, end)
+            for index, move in enumerate(possible_moves):
+                reduction = self.late_move_reduction(board, move, index, depth) if reduce_late else 0
+
+                # Thử nước đi ngay trên bàn cờ
+                board.make_move(move)
+
+                # LMR: tìm nông hơn với cửa sổ rỗng, nước đi vượt alpha/beta thì tìm lại đủ sâu.
+                # Nước chiếu không bị giảm
+                score = None
+                if reduction and not board.is_check(board.current_turn):
+                    self.reductions += 1
+                    score, _ = self.minimax_alpha_beta(board, depth - 1 - reduction, alpha, alpha + 1, False, ply + 1)
+                    if score > alpha:
+                        self.researches += 1
+                        score = None
 
                 # Đệ quy với độ sâu giảm 1
-                score, _ = self.minimax_alpha_beta(board_copy, depth - 1, alpha, beta, False)
+                if score is None:
+                    score, _ = self.minimax_alpha_beta(board, depth - 1, alpha, beta, False, ply + 1)
+                board.unmake_move()
+                # Chỉ nước đầu tiên nằm trên PV
+                self._follow_pv = False
+                # Tìm kiếm bị dừng: điểm của cây con không đầy đủ, không dùng và không lưu vào bảng băm
+                if self.stopped:
+                    return 0, None
 
                 # Cập nhật nước đi tốt nhất
                 if score > best_score:
                     best_score = score
-                    best_move = (start, end)
+                    best_move = move
 
                 alpha = max(alpha, best_score)
                 if beta <= alpha:
+                    self.update_move_ordering(board, move, ply, depth)
                     break
         else:
             best_score = float('inf')
-            for start, end in possible_moves:
-                # Tạo bản sao của bàn cờ để thử nước đi
-                board_copy = board.clone()
-                board_copy.move_piece(start, end)
+            for index, move in enumerate(possible_moves):
+                reduction = self.late_move_reduction(board, move, index, depth) if reduce_late else 0
+
+                # Thử nước đi ngay trên bàn cờ
+                board.make_move(move)
+
+                # LMR: tìm nông hơn với cửa sổ rỗng, nước đi vượt alpha/beta thì tìm lại đủ sâu.
+                # Nước chiếu không bị giảm
+                score = None
+                if reduction and not board.is_check(board.current_turn):
+                    self.reductions += 1
+                    score, _ = self.minimax_alpha_beta(board, depth - 1 - reduction, beta - 1, beta, True, ply + 1)
+                    if score < beta:
+                        self.researches += 1
+                        score = None
 
                 # Đệ quy với độ sâu giảm 1
-                score, _ = self.minimax_alpha_beta(board_copy, depth - 1, alpha, beta, True)
+                if score is None:
+                    score, _ = self.minimax_alpha_beta(board, depth - 1, alpha, beta, True, ply + 1)
+                board.unmake_move()
+                # Chỉ nước đầu tiên nằm trên PV
+                self._follow_pv = False
+                # Tìm kiếm bị dừng: điểm của cây con không đầy đủ, không dùng và không lưu vào bảng băm
+                if self.stopped:
+                    return 0, None
 
                 # Cập nhật nước đi tốt nhất
                 if score < best_score:
                     best_score = score
-                    best_move = (start, end)
+                    best_move = move
 
                 beta = min(beta, best_score)
                 if beta <= alpha:
+                    self.update_move_ordering(board, move, ply, depth)
                     break
 
+        # Lưu kết quả vào bảng băm cùng loại giá trị so với cửa sổ alpha-beta ban đầu
+        if best_score <= alpha_original:
+            flag = UPPER_BOUND
+        elif best_score >= beta_original:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, best_score, flag, best_move)
+
         return best_score, best_move
 
-    # Hàm lấy nước đi tốt nhất dựa trên thuật toán alpha-beta pruning
-    def get_best_move(self, board: Board, use_alpha_beta: bool = True) -> Optional[
-        Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # Bên color còn quân khác ngoài vua và tốt
+    def has_non_pawn_material(self, board: Board, color: str) -> bool:
+        return any(board.piece_lists[color][KNIGHT:KING])
+
+    # Thử nhường lượt cho đối phương và tìm nông hơn R ply với cửa sổ rỗng quanh beta (alpha khi là bên cực tiểu).
+    # Đối phương đi hai nước liền mà điểm vẫn vượt cửa sổ thì nút này gần như chắc chắn bị cắt tỉa
+    def null_move_cutoff(self, board: Board, depth: int, alpha: float, beta: float,
+                         is_maximizing: bool, ply: int) -> bool:
+        static_score = self.evaluate_board(board)
+        if (is_maximizing and static_score < beta) or (not is_maximizing and static_score > alpha):
+            return False
+
+        reduction = NULL_MOVE_REDUCTION + (1 if depth > NULL_MOVE_DEEP_DEPTH else 0)
+        board.make_null_move()
+        if is_maximizing:
+            score, _ = self.minimax_alpha_beta(board, depth - 1 - reduction, beta - 1, beta, False, ply + 1, False)
+        else:
+            score, _ = self.minimax_alpha_beta(board, depth - 1 - reduction, alpha, alpha + 1, True, ply + 1, False)
+        board.unmake_null_move()
+
+        if self.stopped:
+            return False
+        return score >= beta if is_maximizing else score <= alpha
+
+    # Số ply giảm cho nước đi thứ index (0 nếu tìm đủ sâu): chỉ nước yên tĩnh xếp sau các nước đầu
+    def late_move_reduction(self, board: Board, move: Move, index: int, depth: int) -> int:
+        if index < LMR_FULL_DEPTH_MOVES or not self.is_quiet_move(board, move):
+            return 0
+        return 2 if index >= LMR_DEEP_MOVES and depth >= LMR_DEEP_DEPTH else 1
+
+    # Tìm kiếm tĩnh: chỉ xét nước ăn quân và phong cấp cho đến khi thế cờ yên tĩnh
+    def quiescence(self, board: Board, alpha: float, beta: float, is_maximizing: bool) -> int:
+        self.quiescence_nodes += 1
+        if self.should_stop():
+            return 0
+
+        # Stand-pat: bên đang đi có thể không ăn quân và giữ điểm hiện tại
+        stand_pat = self.evaluate_board(board)
+        if is_maximizing:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+
+        moves = self.order_moves(board, list(board.generate_moves(captures_only=True)), MAX_PLY)
+        best_score = stand_pat
+        for move in moves:
+            # Delta pruning: bỏ qua nước ăn quân không thể kéo điểm về cửa sổ alpha-beta
+            victim = board.get_piece(move[1])
+            if victim and not move[2]:
+                gain = MIDGAME_VALUE[victim.type_index] + DELTA_MARGIN
+                if (is_maximizing and stand_pat + gain <= alpha) or (not is_maximizing and stand_pat - gain >= beta):
+                    continue
+
+            board.make_move(move)
+            score = self.quiescence(board, alpha, beta, not is_maximizing)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+
+            if is_maximizing:
+                if score > best_score:
+                    best_score = score
+                alpha = max(alpha, best_score)
+            else:
+                if score < best_score:
+                    best_score = score
+                beta = min(beta, best_score)
+            if beta <= alpha:
+                break
+
+        return best_score
+
+    # Hàm lấy nước đi tốt nhất dựa trên thuật toán alpha-beta pruning.
+    # time_limit (giây): dừng khi hết thời gian; khi bị dừng trả về nước đi của vòng sâu dần đã hoàn thành gần nhất
+    def get_best_move(self, board: Board, use_alpha_beta: bool = True,
+                      time_limit: Optional[float] = None) -> Optional[Move]:
         if board.current_turn != self.color:
             return None
 
-        alpha = float('-inf')
-        beta = float('inf')
-
-        _, minimax_move = self.minimax_alpha_beta(
-            board=board,
-            depth=self.depth,
-            alpha=alpha,
-            beta=beta,
-            is_maximizing=True
-        )
-        return minimax_move
-
-    # Hàm lấy tất cả các nước đi có thể cho một bên
-    def get_all_possible_moves(self, board: Board, color: str) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board.get_piece((row, col))
-                if piece and piece.color == color:
-                    valid_moves = board.get_valid_moves((row, col))
-                    for move in valid_moves:
-                        moves.append(((row, col), move))
-        return moves
+        # Tiến trình phụ dùng tín hiệu dừng chung do tiến trình chính xóa/đặt (start_helpers/stop_helpers)
+        if not self.helper_index:
+            self.stop_signal.clear()
+        self.stopped = False
+        self.deadline = time.time() + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.null_move_cutoffs = 0
+        self.reductions = 0
+        self.researches = 0
+        self.best_move = None
+        self.best_score = None
+        self.principal_variation = []
+        self.iterations = []
+        start_time = time.time()
+
+        # Thế cờ có trong sách khai cuộc thì đi theo sách, không cần tìm kiếm
+        book_move = self.probe_book(board)
+        if book_move:
+            self.best_move = book_move
+            return book_move
+
+        # Killer chỉ có ý nghĩa trong một lần tìm kiếm, history được giảm một nửa để ưu tiên thông tin mới
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self._age_history()
+
+        if self.threads > 1:
+            self.start_helpers(board)
+
+        # Tìm kiếm sâu dần từ độ sâu 1, PV và bảng băm của vòng trước giúp sắp xếp nước đi cho vòng sau
+        for depth in range(1, self.depth + 1):
+            alpha = float('-inf')
+            beta = float('inf')
+            self._follow_pv = True
+
+            score, minimax_move = self.minimax_alpha_beta(
+                board=board,
+                depth=depth,
+                alpha=alpha,
+                beta=beta,
+                is_maximizing=True
+            )
+            if self.stopped or minimax_move is None:
+                break
+
+            # Luôn giữ nước đi của vòng đã hoàn thành gần nhất
+            self.best_move = minimax_move
+            self.best_score = score
+            self.principal_variation = self.get_principal_variation(board, depth)
+            self.iterations.append({
+                'depth': depth,
+                'score': score,
+                'nodes': self.nodes,
+                'time': time.time() - start_time,
+                'pv': self.principal_variation
+            })
+
+        # Kết quả lấy từ tiến trình chính, tiến trình phụ chỉ đóng góp qua bảng băm chung
+        if self.threads > 1:
+            self.stop_helpers()
+        return self.best_move
+
+    # Tra sách khai cuộc, trả về None nếu không có sách, đã quá book_depth ply hoặc thế cờ không có trong sách
+    def probe_book(self, board: Board) -> Optional[Move]:
+        if self.opening_book is None:
+            return None
+        ply = (board.fullmove_number - 1) * 2 + (1 if board.current_turn == "black" else 0)
+        if ply >= self.book_depth:
+            return None
+        return self.opening_book.choose_move(board, self.book_mode)
+
+    # Khởi động threads - 1 tiến trình phụ (nếu chưa có) và chờ chúng gắn vào bảng băm chung.
+    # Tiến trình phụ được dùng lại cho các lần tìm kiếm sau nên chi phí khởi động (spawn, import Model) chỉ tốn một lần
+    def start_pool(self) -> None:
+        if self.helpers:
+            return
+        context = multiprocessing.get_context("spawn")
+        self.helper_results = context.Queue()
+        self.helper_stop = context.Event()
+        for helper_index in range(1, self.threads):
+            tasks = context.Queue()
+            process = context.Process(
+                target=_helper_worker,
+                args=(self.transposition_table.name, helper_index, self.use_quiescence, self.use_null_move,
+                      self.use_lmr, tasks, self.helper_results, self.helper_stop),
+                daemon=True
+            )
+            process.start()
+            self.helpers.append(process)
+            self.helper_tasks.append(tasks)
+        self.wait_helpers()
+
+    # Gửi ảnh chụp thế cờ cho các tiến trình phụ.
+    # Tiến trình phụ lẻ tìm sâu hơn 1 ply để các tiến trình không đi cùng một nhịp
+    def start_helpers(self, board: Board) -> None:
+        self.start_pool()
+        self.helper_stop.clear()
+        snapshot = board.snapshot()
+        for helper_index, tasks in enumerate(self.helper_tasks, 1):
+            tasks.put((snapshot, self.depth + helper_index % 2))
+
+    # Dừng tìm kiếm của các tiến trình phụ khi tiến trình chính đã có kết quả và chờ chúng rảnh
+    def stop_helpers(self) -> None:
+        self.helper_stop.set()
+        self.wait_helpers()
+
+    # Chờ mỗi tiến trình phụ báo xong một lần, đóng cả nhóm nếu có tiến trình đã chết
+    def wait_helpers(self) -> None:
+        pending = len(self.helpers)
+        while pending:
+            try:
+                self.helper_results.get(timeout=0.1)
+                pending -= 1
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.helpers):
+                    self.close_helpers()
+                    return
+
+    # Dừng các tiến trình phụ
+    def close_helpers(self) -> None:
+        for tasks in self.helper_tasks:
+            tasks.put(None)
+        for process in self.helpers:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.helpers = []
+        self.helper_tasks = []
+
+    # Giải phóng tài nguyên khi không dùng ChessAI nữa: tiến trình phụ, file sách khai cuộc (mmap) và bảng bitbase
+    def close(self) -> None:
+        self.close_helpers()
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+        if self.bitbases is not None:
+            self.bitbases.close()
+            self.bitbases = None
+
+    # Yêu cầu dừng tìm kiếm đang chạy (gọi từ thread khác)
+    def stop(self) -> None:
+        self.stop_signal.set()
+
+    # Kiểm tra tín hiệu dừng và thời hạn sau mỗi CHECK_INTERVAL nút.
+    # Thời hạn chỉ có hiệu lực khi đã xong ít nhất một vòng sâu dần để luôn có nước đi trả về
+    def should_stop(self) -> bool:
+        if not self.stopped and (self.nodes + self.quiescence_nodes) & (CHECK_INTERVAL - 1) == 0:
+            if self.stop_signal.is_set():
+                self.stopped = True
+            elif self.deadline is not None and self.iterations and time.time() >= self.deadline:
+                self.stopped = True
+        return self.stopped
+
+    # Kiểm tra nước đi không ăn quân và không phong cấp
+    def is_quiet_move(self, board: Board, move: Move) -> bool:
+        start, end, promotion = move
+        if promotion or board.get_piece(end):
+            return False
+        return not (end == board.en_passant and isinstance(board.get_piece(start), Pawn))
+
+    # Sắp xếp nước đi theo điểm ưu tiên, điểm cao được xét trước
+    def order_moves(self, board: Board, moves: List[Move], ply: int,
+                    hash_move: Optional[Move] = None, pv_move: Optional[Move] = None) -> List[Move]:
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        counter_move = None
+        last_move = board.get_last_move()
+        if last_move:
+            last_piece = last_move[2]
+            counter_move = self.counter_moves.get((last_piece.color, last_piece.type_index, last_move[1]))
+
+        scored = []
+        for move in moves:
+            start, end, promotion = move
+            if move == pv_move:
+                score = PV_MOVE_SCORE
+            elif move == hash_move:
+                score = HASH_MOVE_SCORE
+            else:
+                attacker = board.get_piece(start)
+                victim = board.get_piece(end)
+                if victim:
+                    # MVV-LVA: quân bị ăn giá trị cao, quân ăn giá trị thấp được xét trước
+                    score = CAPTURE_SCORE + ORDERING_VALUES[victim.type_index] * 100 - ORDERING_VALUES[attacker.type_index]
+                elif end == board.en_passant and isinstance(attacker, Pawn):
+                    score = CAPTURE_SCORE + 99
+                elif promotion:
+                    score = PROMOTION_SCORE + (1 if promotion == "queen" else 0)
+                elif move == killers[0]:
+                    score = KILLER_SCORES[0]
+                elif move == killers[1]:
+                    score = KILLER_SCORES[1]
+                elif move == counter_move:
+                    score = COUNTER_MOVE_SCORE
+                else:
+                    score = self.history[attacker.color][attacker.type_index][end[0] * 8 + end[1]]
+            scored.append((score, move))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    # Ghi nhận nước đi yên tĩnh gây cắt tỉa vào killer, history và counter-move
+    def update_move_ordering(self, board: Board, move: Move, ply: int, depth: int) -> None:
+        if not self.is_quiet_move(board, move):
+            return
+
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        piece = board.get_piece(move[0])
+        end = move[1]
+        history = self.history[piece.color][piece.type_index]
+        history[end[0] * 8 + end[1]] += depth * depth
+        if history[end[0] * 8 + end[1]] > HISTORY_LIMIT:
+            self._age_history()
+
+        last_move = board.get_last_move()
+        if last_move:
+            last_piece = last_move[2]
+            self.counter_moves[(last_piece.color, last_piece.type_index, last_move[1])] = move
+
+    # Giảm một nửa điểm history
+    def _age_history(self) -> None:
+        for tables in self.history.values():
+            for table in tables:
+                for sq in range(64):
+                    table[sq] //= 2
+
+    # Lấy chuỗi nước đi tốt nhất bằng cách đi theo nước đi lưu trong bảng băm
+    def get_principal_variation(self, board: Board, depth: int) -> List[Move]:
+        pv = []
+        for _ in range(depth):
+            entry = self.transposition_table.probe(board.zobrist)
+            if entry is None or entry[4] is None:
+                break
+            move = entry[4]
+            # Khóa có thể trùng với thế cờ khác, kiểm tra nước đi còn hợp lệ
+            if move not in board.generate_moves():
+                break
+            pv.append(move)
+            board.make_move(move)
+        for _ in pv:
+            board.unmake_move()
+        return pv
+
+
+# Vòng lặp của tiến trình phụ Lazy SMP: nhận (ảnh chụp thế cờ, độ sâu), tìm kiếm sâu dần như bình thường
+# và ghi kết quả vào bảng băm chung cho đến khi tiến trình chính đặt tín hiệu dừng, rồi báo xong qua results
+def _helper_worker(table_name: str, helper_index: int, use_quiescence: bool, use_null_move: bool, use_lmr: bool,
+                   tasks, results, stop_signal) -> None:
+    ai = ChessAI("white", hash_size_mb=0, use_quiescence=use_quiescence,
+                 use_null_move=use_null_move, use_lmr=use_lmr)
+    ai.transposition_table = SharedTranspositionTable(name=table_name)
+    ai.helper_index = helper_index
+    ai.stop_signal = stop_signal
+    results.put(helper_index)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        snapshot, depth = task
+        board = Board.from_snapshot(snapshot)
+        ai.color = board.current_turn
+        ai.depth = depth
+        ai.get_best_move(board)
+        results.put(helper_index)
+    ai.transposition_table.close()
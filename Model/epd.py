@@ -0,0 +1,80 @@
+from typing import Dict, Iterator, List, Tuple
+
+from Model.board import Board
+
+"""
+    Đọc thế cờ từ file FEN/EPD theo từng dòng, không nạp cả file vào bộ nhớ.
+    Mỗi dòng gồm 4 trường đầu của FEN, có thể thêm 2 bộ đếm nước đi, rồi các thao tác EPD dạng
+    "opcode toán_hạng;" (ví dụ: bm Nf3; id "WAC.001"; hoặc ;D1 20 ;D2 400 của bộ perft).
+    Dòng trống và dòng bắt đầu bằng # được bỏ qua
+"""
+
+
+# Tách phần thao tác EPD thành {opcode: toán hạng}, dấu ; trong chuỗi có ngoặc kép không tách thao tác
+def parse_operations(text: str) -> Dict[str, str]:
+    operations = {}
+    parts: List[str] = []
+    current = ""
+    quoted = False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+
+    for part in parts:
+        fields = part.strip().split(None, 1)
+        if not fields:
+            continue
+        operand = fields[1].strip() if len(fields) > 1 else ""
+        if len(operand) >= 2 and operand[0] == operand[-1] == '"':
+            operand = operand[1:-1]
+        operations[fields[0]] = operand
+    return operations
+
+
+# Tách một dòng FEN/EPD thành (FEN đủ 6 trường, các thao tác EPD)
+def parse_epd(line: str) -> Tuple[str, Dict[str, str]]:
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD: {line!r}")
+    rest = fields[4] if len(fields) > 4 else ""
+
+    # Bộ đếm nước đi của FEN đầy đủ đứng ngay sau 4 trường đầu
+    counters = []
+    while len(counters) < 2:
+        head, _, tail = rest.lstrip().partition(" ")
+        if not head.isdigit():
+            break
+        counters.append(head)
+        rest = tail
+
+    operations = parse_operations(rest)
+    if not counters:
+        counters = [operations.get("hmvc", "0"), operations.get("fmvn", "1")]
+    elif len(counters) == 1:
+        counters.append(operations.get("fmvn", "1"))
+    return " ".join(fields[:4] + counters), operations
+
+
+# Đọc lần lượt (FEN, thao tác EPD) từ file, báo lỗi kèm số dòng
+def read_epd(path: str) -> Iterator[Tuple[str, Dict[str, str]]]:
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield parse_epd(line)
+            except ValueError as error:
+                raise ValueError(f"{path}:{line_number}: {error}") from None
+
+
+# Đọc lần lượt (Board, thao tác EPD) từ file
+def iter_positions(path: str) -> Iterator[Tuple[Board, Dict[str, str]]]:
+    for fen, operations in read_epd(path):
+        yield Board.from_fen(fen), operations
@@ -0,0 +1,141 @@
+import mmap
+import os
+import random
+import struct
+from typing import List, Optional, Tuple
+
+from Model.board import Board, Move
+from Model.bitboard import PAWN, KING, iter_bits, square_position, PAWN_ATTACKS
+from Model.polyglot_keys import RANDOM64
+
+"""
+    Sách khai cuộc định dạng Polyglot (.bin): các bản ghi 16 byte (big-endian) sắp xếp theo khóa
+        khóa thế cờ (8 byte), nước đi (2 byte), trọng số (2 byte), learn (4 byte)
+    File được ánh xạ bằng mmap nên mở sách không đọc file; mỗi lần tra chỉ đọc O(log n) bản ghi bằng tìm kiếm nhị phân.
+    Định dạng: http://hgm.nubati.net/book_format.html
+"""
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+
+CASTLING_OFFSET = 768
+EN_PASSANT_OFFSET = 772
+TURN_OFFSET = 780
+
+# Quân phong cấp theo mã 1..4 của Polyglot
+PROMOTION_PIECES = {1: "knight", 2: "bishop", 3: "rook", 4: "queen"}
+
+
+# Khóa Polyglot của thế cờ. Hàng của Polyglot đánh số từ phía quân trắng (rank 1 = row 7),
+# quân đen dùng chỉ số loại quân chẵn, quân trắng chỉ số lẻ
+def polyglot_key(board: Board) -> int:
+    key = 0
+    for color, offset in (("black", 0), ("white", 1)):
+        for piece_type in range(PAWN, KING + 1):
+            kind = 2 * piece_type + offset
+            for sq in iter_bits(board.bitboards.pieces[color][piece_type]):
+                row, col = square_position(sq)
+                key ^= RANDOM64[64 * kind + 8 * (7 - row) + col]
+
+    # Nhập thành: trắng cánh vua, trắng cánh hậu, đen cánh vua, đen cánh hậu (cùng thứ tự bit của castling_rights)
+    for index in range(4):
+        if board.castling_rights & (1 << index):
+            key ^= RANDOM64[CASTLING_OFFSET + index]
+
+    # Ô bắt tốt qua đường chỉ tính khi bên đang đi có tốt đứng cạnh để bắt
+    if board.en_passant:
+        row, col = board.en_passant
+        target = row * 8 + col
+        defender = "black" if board.current_turn == "white" else "white"
+        if PAWN_ATTACKS[defender][target] & board.bitboards.pieces[board.current_turn][PAWN]:
+            key ^= RANDOM64[EN_PASSANT_OFFSET + col]
+
+    if board.current_turn == "white":
+        key ^= RANDOM64[TURN_OFFSET]
+    return key
+
+
+# Giải mã nước đi 16 bit của Polyglot; nhập thành được ghi là vua đi đến ô của xe
+def decode_book_move(board: Board, code: int) -> Move:
+    end = (7 - ((code >> 3) & 7), code & 7)
+    start = (7 - ((code >> 9) & 7), (code >> 6) & 7)
+    promotion = PROMOTION_PIECES.get((code >> 12) & 7)
+
+    piece = board.get_piece(start)
+    if piece and piece.type_index == KING and start[1] == 4 and end[0] == start[0] and end[1] in (0, 7):
+        end = (end[0], 6 if end[1] == 7 else 2)
+    return start, end, promotion
+
+
+class OpeningBook:
+    def __init__(self, path: str, seed: Optional[int] = None):
+        self.path = path
+        self.random = random.Random(seed)
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.entry_count = size // ENTRY.size
+        # File rỗng không ánh xạ được, coi như sách không có thế cờ nào
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.entry_count else None
+
+    # Vị trí bản ghi đầu tiên có khóa >= key
+    def _lower_bound(self, key: int) -> int:
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self.data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    # Các bản ghi (mã nước đi, trọng số) của khóa key
+    def find_entries(self, key: int) -> List[Tuple[int, int]]:
+        entries = []
+        if not self.entry_count:
+            return entries
+        index = self._lower_bound(key)
+        while index < self.entry_count:
+            entry_key, code, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((code, weight))
+            index += 1
+        return entries
+
+    # Các nước đi hợp lệ trong sách cho thế cờ hiện tại cùng trọng số
+    def get_moves(self, board: Board) -> List[Tuple[Move, int]]:
+        legal_moves = board.game_status()[1]
+        moves = []
+        for code, weight in self.find_entries(polyglot_key(board)):
+            move = decode_book_move(board, code)
+            # Khóa có thể trùng với thế cờ khác, chỉ giữ nước đi hợp lệ
+            if move in legal_moves:
+                moves.append((move, weight))
+        return moves
+
+    # Chọn nước đi từ sách: "weighted" chọn ngẫu nhiên theo trọng số, "best" chọn nước có trọng số cao nhất
+    def choose_move(self, board: Board, mode: str = "weighted") -> Optional[Move]:
+        moves = self.get_moves(board)
+        if not moves:
+            return None
+        if mode == "best":
+            return max(moves, key=lambda item: item[1])[0]
+        if mode != "weighted":
+            raise ValueError(f"Unknown book mode: {mode!r}")
+
+        total = sum(weight for _, weight in moves)
+        if total == 0:
+            return self.random.choice(moves)[0]
+        pick = self.random.randrange(total)
+        for move, weight in moves:
+            pick -= weight
+            if pick < 0:
+                return move
+        return moves[-1][0]
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.entry_count = 0
+        self.file.close()
@@ -0,0 +1,89 @@
+import time
+from typing import Dict, List, Tuple
+
+from Model.board import Board, Move, STARTING_FEN
+
+"""
+    Perft: đếm số nút của cây nước đi đến độ sâu cho trước, dùng để kiểm tra và đo tốc độ bộ sinh nước đi.
+    Số nút chuẩn tham khảo https://www.chessprogramming.org/Perft_Results
+"""
+
+# (tên, FEN, số nút chuẩn ở độ sâu 1, 2, 3, ...)
+PERFT_POSITIONS: List[Tuple[str, str, List[int]]] = [
+    ("startpos", STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    # Nhập thành, bắt tốt qua đường, ghim, phong cấp
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    # Tàn cuộc: ghim theo hàng ngang khi bắt tốt qua đường
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    # Phong cấp, ăn quân khi phong cấp, chiếu
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+    # Ô bắt tốt qua đường đọc từ FEN
+    ("ep_fen", "4k3/8/8/8/4Pp2/8/8/4K3 b - e3 0 1",
+     [7, 38, 276, 1799, 13215]),
+]
+
+# (tên, FEN) mà Board.from_fen phải từ chối
+INVALID_FENS: List[Tuple[str, str]] = [
+    # Ô bắt tốt qua đường không có tốt đối phương phía trước
+    ("ep_no_pawn", "4k3/8/8/8/5p2/8/8/4K3 b - e3 0 1"),
+    # Ô bắt tốt qua đường ở hàng của bên đang đi
+    ("ep_wrong_side", "4k3/8/8/8/4Pp2/8/8/4K3 w - e3 0 1"),
+    # Ký tự lạ trong trường nhập thành
+    ("castling_char", "r3k2r/8/8/8/8/8/8/R3K2R w Zq - 0 1"),
+    # Thiếu vua, thừa vua
+    ("no_white_king", "4k3/8/8/8/8/8/8/8 w - - 0 1"),
+    ("two_kings", "4k3/8/8/8/8/8/8/3KK3 w - - 0 1"),
+    # Bên không đi đang bị chiếu
+    ("opponent_check", "4k3/8/8/8/8/8/8/4RK2 w - - 0 1"),
+]
+
+
+# Đếm số nút lá ở độ sâu depth, ở độ sâu 1 chỉ cần đếm số nước đi
+def perft(board: Board, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = list(board.generate_moves())
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+# Số nút theo từng nước đi ở gốc, dùng để tìm nước đi bị sinh sai
+def divide(board: Board, depth: int) -> Dict[Move, int]:
+    result = {}
+    for move in list(board.generate_moves()):
+        board.make_move(move)
+        result[move] = perft(board, depth - 1)
+        board.unmake_move()
+    return result
+
+
+# Ký hiệu nước đi dạng e2e4, e7e8q
+def move_to_uci(move: Move) -> str:
+    start, end, promotion = move
+    text = chr(97 + start[1]) + str(8 - start[0]) + chr(97 + end[1]) + str(8 - end[0])
+    if promotion:
+        text += "n" if promotion == "knight" else promotion[0]
+    return text
+
+
+# Chạy perft cho một thế cờ, trả về (số nút, thời gian)
+def run_perft(fen: str, depth: int) -> Tuple[int, float]:
+    board = Board.from_fen(fen)
+    start_time = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start_time
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Iterator
+from Model.bitboard import (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BETWEEN, SQUARE_POSITIONS,
+                            KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, iter_bits,
+                            WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
 
 # abtract class Piece
 class Piece(ABC):
+    type_index = -1  # Chỉ số loại quân trong bitboard và bảng đánh giá
+
     def __init__(self, color: str, position: Tuple[int, int]):
         self.color = color
         self.position = position
@@ -14,14 +19,19 @@ class Piece(ABC):
     def is_valid_move(self, board, target_position: Tuple[int, int]) -> bool:
         pass
 
+    # Sinh các ô đích theo bảng bước/tia tính sẵn (chưa kiểm tra vua bị chiếu)
+    @abstractmethod
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        pass
+
     # Lấy danh sách các nước đi hợp lệ
     def get_valid_moves(self, board) -> List[Tuple[int, int]]:
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                if self.is_valid_move(board, (row, col)):
-                    valid_moves.append((row, col))
-        return valid_moves
+        return list(self.get_candidate_moves(board))
+
+    # Các ô đích trong bitboard attacks, bỏ qua ô có quân cùng màu
+    def _targets(self, board, attacks: int) -> Iterator[Tuple[int, int]]:
+        for sq in iter_bits(attacks & ~board.bitboards.occupancy[self.color]):
+            yield SQUARE_POSITIONS[sq]
     
     def move(self, target_position: Tuple[int, int]):
         self.position = target_position
@@ -46,7 +56,14 @@ class Piece(ABC):
 
 
 
+# Kiểm tra các ô nằm giữa start và end (cùng hàng/cột/đường chéo) đều trống, dùng bitboard của bàn cờ
+def _is_path_clear(board, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    return not (BETWEEN[start[0] * 8 + start[1]][end[0] * 8 + end[1]] & board.bitboards.occupied)
+
+
 class Pawn(Piece):
+    type_index = PAWN
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 1
@@ -87,20 +104,34 @@ class Pawn(Piece):
                 # Kiểm tra có quân đối phương để ăn không
                 if target_piece and target_piece.color != self.color:
                     return True
-                # Kiểm tra nước đi en passant
-                if not target_piece and board.move_history:
-                    last_move = board.move_history[-1]
-                    last_piece = last_move[2]
-
-                    # Kiểm tra nếu quân cờ vừa di chuyển là tốt đối phương
-                    if (isinstance(last_piece, Pawn) and
-                        last_piece.color != self.color and
-                        abs(last_move[0][0] - last_move[1][0]) == 2 and  # Di chuyển 2 ô
-                        last_move[1][0] == self.position[0] and  # Cùng hàng với tốt hiện tại
-                        last_move[1][1] == target_position[1]):  # Cùng cột với vị trí đích
-                        return True
+                # Kiểm tra nước đi en passant: ô đích là ô tốt đối phương vừa đi qua (hàng 2 với trắng, hàng 5 với đen)
+                if (not target_piece and target_position == board.en_passant and
+                        target_position[0] == (2 if self.color == "white" else 5)):
+                    return True
         return False
 
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        row, col = self.position
+        direction = -1 if self.color == "white" else 1
+        occupied = board.bitboards.occupied
+
+        # Đi thẳng 1 ô và 2 ô từ vị trí ban đầu
+        one_step = (row + direction) * 8 + col
+        if 0 <= one_step < 64 and not occupied >> one_step & 1:
+            yield SQUARE_POSITIONS[one_step]
+            two_step = one_step + 8 * direction
+            if row == self.start_row and not occupied >> two_step & 1:
+                yield SQUARE_POSITIONS[two_step]
+
+        # Ăn chéo, ô trống thì chỉ có thể là bắt tốt qua đường
+        opponent = "black" if self.color == "white" else "white"
+        attacks = PAWN_ATTACKS[self.color][row * 8 + col]
+        for sq in iter_bits(attacks & board.bitboards.occupancy[opponent]):
+            yield SQUARE_POSITIONS[sq]
+        for sq in iter_bits(attacks & ~occupied):
+            if self.is_valid_move(board, SQUARE_POSITIONS[sq]):
+                yield SQUARE_POSITIONS[sq]
+
     # Kiểm tra phong cấp
     def can_promote(self):
         if self.color == "white" and self.position[0] == 0:
@@ -111,6 +142,8 @@ class Pawn(Piece):
 
 
 class Knight(Piece):
+    type_index = KNIGHT
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 3
@@ -133,8 +166,13 @@ class Knight(Piece):
         col_diff = abs(target_position[1] - self.position[1])
         return (row_diff == 2 and col_diff == 1) or (row_diff == 1 and col_diff == 2)
 
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        return self._targets(board, KNIGHT_ATTACKS[self.position[0] * 8 + self.position[1]])
+
 
 class Bishop(Piece):
+    type_index = BISHOP
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 3
@@ -155,23 +193,19 @@ class Bishop(Piece):
         # Kiểm tra di chuyển theo đường chéo
         if abs(target_position[0] - self.position[0]) != abs(target_position[1] - self.position[1]):
             return False
-            
+        if target_position == self.position:
+            return False
+
         # Kiểm tra có quân cờ nào chặn đường không
-        row_direction = 1 if target_position[0] > self.position[0] else -1
-        col_direction = 1 if target_position[1] > self.position[1] else -1
-        current_row = self.position[0] + row_direction
-        current_col = self.position[1] + col_direction
-        
-        while current_row != target_position[0]:
-            if board.get_piece((current_row, current_col)):
-                return False
-            current_row += row_direction
-            current_col += col_direction
-            
-        return True
+        return _is_path_clear(board, self.position, target_position)
 
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        sq = self.position[0] * 8 + self.position[1]
+        return self._targets(board, bishop_attacks(sq, board.bitboards.occupied))
 
 class Rook(Piece):
+    type_index = ROOK
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 5
@@ -193,24 +227,19 @@ class Rook(Piece):
         if target_position[0] != self.position[0] and target_position[1] != self.position[1]:
             return False
             
+        if target_position == self.position:
+            return False
+
         # Kiểm tra có quân cờ nào chặn đường không
-        if target_position[0] == self.position[0]:  # Di chuyển ngang
-            start = min(self.position[1], target_position[1]) + 1
-            end = max(self.position[1], target_position[1])
-            for col in range(start, end):
-                if board.get_piece((self.position[0], col)):
-                    return False
-        else:  # Di chuyển dọc
-            start = min(self.position[0], target_position[0]) + 1
-            end = max(self.position[0], target_position[0])
-            for row in range(start, end):
-                if board.get_piece((row, self.position[1])):
-                    return False
-                    
-        return True
+        return _is_path_clear(board, self.position, target_position)
 
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        sq = self.position[0] * 8 + self.position[1]
+        return self._targets(board, rook_attacks(sq, board.bitboards.occupied))
 
 class Queen(Piece):
+    type_index = QUEEN
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 9
@@ -229,13 +258,24 @@ class Queen(Piece):
             return False
             
         # Hậu có thể di chuyển như xe hoặc tượng
-        temp_rook = Rook(self.color, self.position)
-        temp_bishop = Bishop(self.color, self.position)
-        return (temp_rook.is_valid_move(board, target_position) or 
-                temp_bishop.is_valid_move(board, target_position))
+        row_diff = abs(target_position[0] - self.position[0])
+        col_diff = abs(target_position[1] - self.position[1])
+        if row_diff == 0 and col_diff == 0:
+            return False
+        if row_diff != 0 and col_diff != 0 and row_diff != col_diff:
+            return False
+
+        # Kiểm tra có quân cờ nào chặn đường không
+        return _is_path_clear(board, self.position, target_position)
 
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        sq = self.position[0] * 8 + self.position[1]
+        occupied = board.bitboards.occupied
+        return self._targets(board, rook_attacks(sq, occupied) | bishop_attacks(sq, occupied))
 
 class King(Piece):
+    type_index = KING
+
     def __init__(self, color: str, position: Tuple[int, int]):
         super().__init__(color, position)
         self.value = 0  # Vua không có giá trị vì không thể bị ăn
@@ -265,17 +305,23 @@ class King(Piece):
 
         # Nhập thành
         if not self.has_moved and row_diff == 0 and col_diff == 2:
-            # Kiểm tra xe có ở đúng vị trí không
-            rook_col = 7 if target_position[1] > self.position[1] else 0
+            # Kiểm tra quyền nhập thành và xe có ở đúng vị trí không
+            kingside = target_position[1] > self.position[1]
+            if self.color == "white":
+                right = WHITE_KINGSIDE if kingside else WHITE_QUEENSIDE
+            else:
+                right = BLACK_KINGSIDE if kingside else BLACK_QUEENSIDE
+            if not board.castling_rights & right:
+                return False
+            rook_col = 7 if kingside else 0
             rook = board.get_piece((self.position[0], rook_col))
-            if not (isinstance(rook, Rook) and not rook.has_moved):
+            if not (isinstance(rook, Rook) and rook.color == self.color):
                 return False
 
-            # Kiểm tra có quân cờ nào chặn đường không
+            # Kiểm tra có quân cờ nào chặn đường giữa vua và xe không
             direction = 1 if target_position[1] > self.position[1] else -1
-            for col in range(self.position[1] + direction, target_position[1], direction):
-                if board.get_piece((self.position[0], col)):
-                    return False
+            if not _is_path_clear(board, self.position, (self.position[0], rook_col)):
+                return False
 
             # Kiểm tra vua và các ô đi qua có bị tấn công không
             if board.is_check(self.color):
@@ -288,4 +334,14 @@ class King(Piece):
 
             return True
             
-        return False
\ No newline at end of file
+        return False
+
+    def get_candidate_moves(self, board) -> Iterator[Tuple[int, int]]:
+        row, col = self.position
+        yield from self._targets(board, KING_ATTACKS[row * 8 + col])
+
+        # Nhập thành, chỉ thử khi vua chưa di chuyển
+        if not self.has_moved:
+            for target in ((row, col + 2), (row, col - 2)):
+                if 0 <= target[1] < 8 and self.is_valid_move(board, target):
+                    yield target
@@ -0,0 +1,223 @@
+import struct
+import weakref
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+# Loại giá trị lưu trong bảng: chính xác, cận dưới (fail-high), cận trên (fail-low)
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Bộ nhớ cho một ô của bảng, tính bằng byte: con trỏ trong danh sách, tuple 5 phần tử, khóa 64 bit, điểm
+# và tuple nước đi riêng của ô. Đo bằng tracemalloc khi bảng đầy (khoảng 210-220 byte), làm tròn lên
+ENTRY_BYTES = 240
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: int = 16):
+        # Mỗi bucket có 2 ô: một ô ưu tiên độ sâu, một ô luôn ghi đè
+        bucket_count = max(1, size_mb * 1024 * 1024 // (2 * ENTRY_BYTES))
+        # Làm tròn xuống lũy thừa của 2 để lấy chỉ số bằng phép and
+        self.size = 1 << (bucket_count.bit_length() - 1)
+        self.mask = self.size - 1
+        self.size_mb = size_mb
+
+        # Mỗi ô là tuple (khóa, độ sâu, điểm, loại giá trị, nước đi tốt nhất) hoặc None
+        self.depth_slots = [None] * self.size
+        self.always_slots = [None] * self.size
+
+        # Bộ đếm thống kê
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    # Tìm thế cờ trong bảng, trả về (khóa, độ sâu, điểm, loại giá trị, nước đi) hoặc None
+    def probe(self, key: int) -> Optional[Tuple]:
+        self.probes += 1
+        index = key & self.mask
+
+        entry = self.depth_slots[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self.always_slots[index]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+
+        # Bucket đang chứa thế cờ khác có cùng chỉ số
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    # Lưu kết quả tìm kiếm, ô ưu tiên độ sâu chỉ bị thay bằng kết quả sâu hơn hoặc cùng thế cờ
+    def store(self, key: int, depth: int, score: int, flag: int, move) -> None:
+        self.stores += 1
+        index = key & self.mask
+        entry = (key, depth, score, flag, move)
+
+        current = self.depth_slots[index]
+        if current is None or current[0] == key or depth >= current[1]:
+            # Kết quả cũ bị đẩy xuống ô luôn ghi đè nếu là thế cờ khác
+            if current is not None and current[0] != key:
+                self.always_slots[index] = current
+            self.depth_slots[index] = entry
+        else:
+            self.always_slots[index] = entry
+
+    # Xóa toàn bộ bảng (khi bắt đầu ván mới)
+    def clear(self) -> None:
+        self.depth_slots = [None] * self.size
+        self.always_slots = [None] * self.size
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    # Tỷ lệ ô đã dùng (ước lượng theo 1000 bucket đầu tiên)
+    def hashfull(self) -> int:
+        sample = min(1000, self.size)
+        used = sum(1 for i in range(sample) if self.depth_slots[i] is not None)
+        return used * 1000 // sample
+
+
+# Mã hóa nước đi thành số nguyên 16 bit: ô đi (6 bit), ô đến (6 bit), quân phong cấp (3 bit); 0 là không có nước đi
+PROMOTION_CODES = {None: 0, "queen": 1, "rook": 2, "bishop": 3, "knight": 4}
+PROMOTION_NAMES = {code: name for name, code in PROMOTION_CODES.items()}
+
+
+def encode_move(move) -> int:
+    if move is None:
+        return 0
+    (start_row, start_col), (end_row, end_col), promotion = move
+    return ((start_row * 8 + start_col) | ((end_row * 8 + end_col) << 6)
+            | (PROMOTION_CODES[promotion] << 12))
+
+
+def decode_move(code: int):
+    if code == 0:
+        return None
+    start, end = code & 63, (code >> 6) & 63
+    return (start >> 3, start & 7), (end >> 3, end & 7), PROMOTION_NAMES[code >> 12]
+
+
+# Mỗi ô gồm 2 số 64 bit: (khóa xor dữ liệu, dữ liệu); bucket có 2 ô như TranspositionTable
+SLOT = struct.Struct("<QQ")
+BUCKET_BYTES = 2 * SLOT.size
+SCORE_OFFSET = 1 << 31
+
+
+class SharedTranspositionTable:
+    """
+        Bảng băm đặt trong multiprocessing.shared_memory để nhiều tiến trình tìm kiếm dùng chung (Lazy SMP).
+        Cùng giao diện probe/store với TranspositionTable; không dùng khóa, mỗi ô lưu khóa xor dữ liệu
+        nên ô bị hai tiến trình ghi đè cùng lúc sẽ không khớp khóa và bị bỏ qua như ô trống
+    """
+
+    def __init__(self, size_mb: int = 16, name: Optional[str] = None):
+        if name is None:
+            # Tiến trình chính tạo vùng nhớ, làm tròn số bucket xuống lũy thừa của 2
+            bucket_count = max(1, size_mb * 1024 * 1024 // BUCKET_BYTES)
+            self.size = 1 << (bucket_count.bit_length() - 1)
+            self.memory = shared_memory.SharedMemory(create=True, size=self.size * BUCKET_BYTES)
+            self.memory.buf[:self.size * BUCKET_BYTES] = bytes(self.size * BUCKET_BYTES)
+            self.owner = True
+        else:
+            # Tiến trình phụ gắn vào vùng nhớ đã có theo tên
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.size = 1 << ((len(self.memory.buf) // BUCKET_BYTES).bit_length() - 1)
+            self.owner = False
+        self.name = self.memory.name
+        self.mask = self.size - 1
+        self.size_mb = self.size * BUCKET_BYTES // (1024 * 1024)
+        self.buffer = self.memory.buf
+
+        # Bộ đếm thống kê của tiến trình hiện tại
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+        # Giải phóng vùng nhớ khi đối tượng bị thu hồi
+        self._finalizer = weakref.finalize(self, _release_memory, self.memory, self.owner)
+
+    # Gói (độ sâu, điểm, loại giá trị, nước đi) vào một số 64 bit
+    @staticmethod
+    def _pack(depth: int, score: int, flag: int, move) -> int:
+        return (encode_move(move) | (flag << 16) | (min(max(depth, 0), 255) << 18)
+                | ((int(score) + SCORE_OFFSET) << 26))
+
+    @staticmethod
+    def _unpack(key: int, data: int) -> Tuple:
+        return key, (data >> 18) & 255, (data >> 26) - SCORE_OFFSET, (data >> 16) & 3, decode_move(data & 0xFFFF)
+
+    # Đọc ô thứ slot (0: ưu tiên độ sâu, 1: luôn ghi đè) của bucket, trả về (khóa, dữ liệu) hoặc None nếu trống/hỏng
+    def _read(self, index: int, slot: int) -> Optional[Tuple[int, int]]:
+        checked_key, data = SLOT.unpack_from(self.buffer, index * BUCKET_BYTES + slot * SLOT.size)
+        if checked_key == 0 and data == 0:
+            return None
+        return checked_key ^ data, data
+
+    def _write(self, index: int, slot: int, key: int, data: int) -> None:
+        SLOT.pack_into(self.buffer, index * BUCKET_BYTES + slot * SLOT.size, key ^ data, data)
+
+    # Tìm thế cờ trong bảng, trả về (khóa, độ sâu, điểm, loại giá trị, nước đi) hoặc None
+    def probe(self, key: int) -> Optional[Tuple]:
+        self.probes += 1
+        index = key & self.mask
+
+        entry = self._read(index, 0)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return self._unpack(key, entry[1])
+        other = self._read(index, 1)
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return self._unpack(key, other[1])
+
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    # Lưu kết quả tìm kiếm, cùng chính sách thay thế với TranspositionTable
+    def store(self, key: int, depth: int, score: int, flag: int, move) -> None:
+        self.stores += 1
+        index = key & self.mask
+        data = self._pack(depth, score, flag, move)
+
+        current = self._read(index, 0)
+        if current is None or current[0] == key or depth >= (current[1] >> 18) & 255:
+            if current is not None and current[0] != key:
+                self._write(index, 1, current[0], current[1])
+            self._write(index, 0, key, data)
+        else:
+            self._write(index, 1, key, data)
+
+    def clear(self) -> None:
+        self.buffer[:self.size * BUCKET_BYTES] = bytes(self.size * BUCKET_BYTES)
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    # Tỷ lệ ô đã dùng (ước lượng theo 1000 bucket đầu tiên)
+    def hashfull(self) -> int:
+        sample = min(1000, self.size)
+        used = sum(1 for i in range(sample) if self._read(i, 0) is not None)
+        return used * 1000 // sample
+
+    # Đóng vùng nhớ chung, tiến trình chính đồng thời xóa vùng nhớ khỏi hệ thống
+    def close(self) -> None:
+        self.buffer = None
+        self._finalizer()
+
+
+def _release_memory(memory: shared_memory.SharedMemory, owner: bool) -> None:
+    memory.close()
+    if owner:
+        memory.unlink()
@@ -0,0 +1,25 @@
+import random
+
+"""
+    Khóa Zobrist cho từng quân trên từng ô, bên đi, quyền nhập thành và cột bắt tốt qua đường.
+    Dùng seed cố định để khóa của một thế cờ giống nhau giữa các lần chạy (cần cho bảng băm và benchmark)
+"""
+
+_random = random.Random(20240415)
+
+
+def _random_key() -> int:
+    return _random.getrandbits(64)
+
+
+# PIECE_KEYS[color][piece_type][sq]
+PIECE_KEYS = {color: [[_random_key() for _ in range(64)] for _ in range(6)] for color in ("white", "black")}
+
+# Xor vào khi đến lượt quân đen
+SIDE_KEY = _random_key()
+
+# Một khóa cho mỗi tổ hợp quyền nhập thành (bitmask 4 bit)
+CASTLING_KEYS = [_random_key() for _ in range(16)]
+
+# Một khóa cho mỗi cột có thể bắt tốt qua đường
+EN_PASSANT_KEYS = [_random_key() for _ in range(8)]